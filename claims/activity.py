@@ -0,0 +1,79 @@
+"""Claim activity stream.
+
+Events are appended as flags and notes are written or claims are imported,
+and read newest first with keyset pagination on (created_at, id), which the
+(claim, created_at, id) and (created_at, id) indexes serve directly, so deep
+pages cost the same as the first one.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import live
+from .models import ActivityEvent
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+SUMMARY_LENGTH = ActivityEvent._meta.get_field('summary').max_length
+
+
+def build_event(claim_id, event_type, user=None, summary='', object_id=None):
+    """Unsaved event; summary is truncated to fit the column"""
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH - 3] + '...'
+    return ActivityEvent(
+        claim_id=claim_id,
+        user=user,
+        event_type=event_type,
+        summary=summary,
+        object_id=object_id,
+    )
+
+
+def record_event(claim_id, event_type, user=None, summary='', object_id=None):
+    """Append one event; live streams receive it once the transaction commits"""
+    event = build_event(claim_id, event_type, user, summary, object_id)
+    event.save()
+    transaction.on_commit(partial(live.broker.publish, [event]))
+    return event
+
+
+def record_events(events):
+    """Append many events built with build_event() in batched INSERTs"""
+    events = ActivityEvent.objects.bulk_create(events, batch_size=settings.CLAIMS_BULK_BATCH_SIZE)
+    transaction.on_commit(partial(live.broker.publish, events))
+    return events
+
+
+def encode_cursor(event):
+    """Opaque position after which the next page starts"""
+    delta = event.created_at - EPOCH
+    return f'{delta // timedelta(microseconds=1)}-{event.pk}'
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor, or None if it is missing or malformed"""
+    try:
+        micros, pk = cursor.split('-')
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def activity_page(events_qs, cursor=None, limit=None):
+    """One page of events newest first; returns (events, next_cursor or None)"""
+    limit = limit or settings.ACTIVITY_PAGE_SIZE
+    events_qs = events_qs.select_related('user', 'claim').order_by('-created_at', '-id')
+
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        events_qs = events_qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # Fetch one extra row to know whether another page exists
+    events = list(events_qs[:limit + 1])
+    next_cursor = encode_cursor(events[limit - 1]) if len(events) > limit else None
+    return events[:limit], next_cursor
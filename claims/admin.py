@@ -1,13 +1,13 @@
 from django.contrib import admin
-from .models import Claim, ClaimDetail, Flag, Note
+from .models import ActivityEvent, AgingSnapshot, ArchivedClaim, Claim, ClaimDetail, Flag, Note
 
 
 @admin.register(Claim)
 class ClaimAdmin(admin.ModelAdmin):
-    list_display = ['id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date']
+    list_display = ['claim_number', 'patient_name', 'billed_amount', 'paid_amount', 'underpayment', 'status', 'insurer_name', 'discharge_date']
     list_filter = ['status', 'insurer_name', 'discharge_date']
-    search_fields = ['id', 'patient_name', 'insurer_name']
-    readonly_fields = ['created_at', 'updated_at']
+    search_fields = ['claim_number', 'patient_name', 'insurer_name']
+    readonly_fields = ['underpayment', 'created_at', 'updated_at']
     ordering = ['-discharge_date']
 
 
@@ -15,7 +15,7 @@ class ClaimAdmin(admin.ModelAdmin):
 class ClaimDetailAdmin(admin.ModelAdmin):
     list_display = ['id', 'claim', 'cpt_codes', 'denial_reason']
     list_filter = ['claim__status']
-    search_fields = ['claim__id', 'claim__patient_name', 'cpt_codes']
+    search_fields = ['claim__claim_number', 'claim__patient_name', 'cpt_codes']
     readonly_fields = ['created_at']
 
 
@@ -23,7 +23,7 @@ class ClaimDetailAdmin(admin.ModelAdmin):
 class FlagAdmin(admin.ModelAdmin):
     list_display = ['claim', 'user', 'reason', 'is_resolved', 'created_at']
     list_filter = ['is_resolved', 'created_at']
-    search_fields = ['claim__id', 'user__username', 'reason']
+    search_fields = ['claim__claim_number', 'user__username', 'reason']
     readonly_fields = ['created_at']
 
 
@@ -31,9 +31,42 @@ class FlagAdmin(admin.ModelAdmin):
 class NoteAdmin(admin.ModelAdmin):
     list_display = ['claim', 'user', 'note_type', 'content_preview', 'created_at']
     list_filter = ['note_type', 'created_at']
-    search_fields = ['claim__id', 'user__username', 'content']
+    search_fields = ['claim__claim_number', 'user__username', 'content']
     readonly_fields = ['created_at', 'updated_at']
 
     def content_preview(self, obj):
         return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
     content_preview.short_description = "Content Preview"
+
+
+@admin.register(AgingSnapshot)
+class AgingSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['snapshot_date', 'status', 'insurer_name', 'bucket', 'claim_count', 'underpayment_total']
+    list_filter = ['snapshot_date', 'status', 'bucket']
+    search_fields = ['insurer_name']
+    readonly_fields = ['created_at']
+
+
+@admin.register(ActivityEvent)
+class ActivityEventAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'event_type', 'claim', 'user', 'summary']
+    list_filter = ['event_type', 'created_at']
+    search_fields = ['claim__claim_number', 'user__username', 'summary']
+    readonly_fields = ['claim', 'user', 'event_type', 'summary', 'object_id', 'created_at']
+
+    def has_change_permission(self, request, obj=None):
+        # Append-only stream
+        return False
+
+
+@admin.register(ArchivedClaim)
+class ArchivedClaimAdmin(admin.ModelAdmin):
+    list_display = ['claim_number', 'patient_name', 'status', 'insurer_name', 'discharge_date', 'archived_at']
+    list_filter = ['status', 'discharge_date']
+    search_fields = ['claim_number', 'patient_name', 'insurer_name']
+    exclude = ['payload']
+    readonly_fields = ['claim_number', 'patient_name', 'status', 'insurer_name', 'discharge_date', 'archived_at']
+
+    def has_change_permission(self, request, obj=None):
+        # Archived records are read-only
+        return False
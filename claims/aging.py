@@ -0,0 +1,126 @@
+"""Claim aging buckets.
+
+Bucketing is a single ``CASE`` expression over ``discharge_date`` grouped by
+insurer, so every bucket for every insurer comes back from one query. The
+same rows feed the dashboard and the nightly ``snapshot_aging`` command,
+which stores them in ``AgingSnapshot`` so trends are charted from the
+snapshot table instead of rescanning claim history.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Sum, Value, When
+from django.utils import timezone
+
+from .models import AgingSnapshot
+
+
+def validate_bucket_edges(edges):
+    """Day edges as a tuple; ValueError unless non-empty and strictly increasing"""
+    edges = tuple(int(edge) for edge in edges)
+    if not edges:
+        raise ValueError('at least one bucket edge is required')
+    if any(lower >= upper for lower, upper in zip(edges, edges[1:])):
+        raise ValueError(f'bucket edges must be strictly increasing, got {", ".join(map(str, edges))}')
+    return edges
+
+
+def get_bucket_edges(edges=None):
+    """Day edges, e.g. (30, 60, 90), defaulting to CLAIMS_AGING_BUCKET_EDGES"""
+    if edges is not None:
+        return validate_bucket_edges(edges)
+    try:
+        return validate_bucket_edges(settings.CLAIMS_AGING_BUCKET_EDGES)
+    except ValueError as e:
+        raise ImproperlyConfigured(f'CLAIMS_AGING_BUCKET_EDGES: {e}')
+
+
+def bucket_labels(edges=None):
+    """Bucket labels for the edges, e.g. ['0-30', '31-60', '61-90', '90+']"""
+    edges = get_bucket_edges(edges)
+    labels = []
+    lower = 0
+    for edge in edges:
+        labels.append(f'{lower}-{edge}')
+        lower = edge + 1
+    labels.append(f'{edges[-1]}+')
+    return labels
+
+
+def bucket_expression(edges=None, today=None):
+    """CASE expression mapping discharge_date to its aging bucket label"""
+    edges = get_bucket_edges(edges)
+    today = today or timezone.now().date()
+    labels = bucket_labels(edges)
+    return Case(
+        *[
+            When(discharge_date__gte=today - timedelta(days=edge), then=Value(label))
+            for edge, label in zip(edges, labels)
+        ],
+        default=Value(labels[-1]),
+        output_field=CharField(),
+    )
+
+
+def aging_rows(claims_qs, status='Under Review', edges=None, today=None):
+    """One grouped query: claim count and underpayment per (insurer, bucket)"""
+    if status:
+        claims_qs = claims_qs.filter(status=status)
+    return list(
+        claims_qs.annotate(bucket=bucket_expression(edges, today))
+        .values('insurer_name', 'bucket')
+        .annotate(claim_count=Count('id'), underpayment_total=Sum('underpayment'))
+        .order_by('insurer_name', 'bucket')
+    )
+
+
+def aging_breakdown(claims_qs, status='Under Review', edges=None, today=None):
+    """Bucket totals and per-insurer bucket counts for one status"""
+    labels = bucket_labels(edges)
+    totals = dict.fromkeys(labels, 0)
+    by_insurer = {}
+    for row in aging_rows(claims_qs, status, edges, today):
+        totals[row['bucket']] += row['claim_count']
+        insurer_counts = by_insurer.setdefault(row['insurer_name'], dict.fromkeys(labels, 0))
+        insurer_counts[row['bucket']] += row['claim_count']
+    return {'labels': labels, 'totals': totals, 'by_insurer': by_insurer}
+
+
+def take_snapshot(claims_qs, statuses=None, edges=None, snapshot_date=None):
+    """Store today's aging rows, replacing any snapshot already taken for that date"""
+    if statuses is None:
+        statuses = settings.CLAIMS_AGING_SNAPSHOT_STATUSES
+    snapshot_date = snapshot_date or timezone.now().date()
+
+    snapshots = [
+        AgingSnapshot(
+            snapshot_date=snapshot_date,
+            status=status,
+            insurer_name=row['insurer_name'],
+            bucket=row['bucket'],
+            claim_count=row['claim_count'],
+            underpayment_total=row['underpayment_total'] or 0,
+        )
+        for status in statuses
+        for row in aging_rows(claims_qs, status, edges, snapshot_date)
+    ]
+
+    with transaction.atomic():
+        AgingSnapshot.objects.filter(snapshot_date=snapshot_date, status__in=statuses).delete()
+        AgingSnapshot.objects.bulk_create(snapshots)
+    return snapshots
+
+
+def aging_trend(status='Under Review', days=90):
+    """Bucket counts per snapshot date across insurers, read from the snapshot table only"""
+    snapshots = AgingSnapshot.objects.filter(
+        status=status,
+        snapshot_date__gte=timezone.now().date() - timedelta(days=days),
+    )
+    return list(
+        snapshots.values('snapshot_date', 'bucket')
+        .annotate(claim_count=Sum('claim_count'))
+        .order_by('snapshot_date', 'bucket')
+    )
@@ -0,0 +1,177 @@
+"""Cold claims archive.
+
+Old, closed claims are moved out of the hot tables into ``ArchivedClaim``:
+one row per claim holding the searchable columns plus the whole record
+(details, flags, notes and activity) as compressed JSON. The claims list
+and ``claim_detail`` fall back to the archive when the hot tables have no
+match, so archived claims stay reachable while scans and indexes on the
+hot tables only cover live work.
+"""
+import json
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ActivityEvent, ArchivedClaim, Claim, ClaimDetail, Flag, Note
+
+# Rows deleted along with an archived claim, with their prefetched relation
+CHILD_MODELS = [(ClaimDetail, 'details'), (Flag, 'flags'), (Note, 'notes'), (ActivityEvent, 'activity')]
+
+
+def archivable_claims(days=None, statuses=None, today=None):
+    """Claims in statuses discharged more than `days` ago"""
+    if days is None:
+        days = settings.CLAIMS_ARCHIVE_AFTER_DAYS
+    if statuses is None:
+        statuses = settings.CLAIMS_ARCHIVE_STATUSES
+    today = today or timezone.now().date()
+    return Claim.objects.filter(status__in=statuses, discharge_date__lt=today - timedelta(days=days))
+
+
+def claim_record(claim):
+    """The claim and everything attached to it as a JSON-serializable dict"""
+    return {
+        'claim_number': claim.claim_number,
+        'patient_name': claim.patient_name,
+        'billed_amount': claim.billed_amount,
+        'paid_amount': claim.paid_amount,
+        'underpayment': claim.underpayment,
+        'status': claim.status,
+        'insurer_name': claim.insurer_name,
+        'discharge_date': claim.discharge_date,
+        'created_at': claim.created_at,
+        'updated_at': claim.updated_at,
+        'details': [
+            {'cpt_codes': detail.cpt_codes, 'denial_reason': detail.denial_reason, 'created_at': detail.created_at}
+            for detail in claim.details.all()
+        ],
+        'flags': [
+            {
+                'reason': flag.reason,
+                'is_resolved': flag.is_resolved,
+                'username': flag.user.username,
+                'created_at': flag.created_at,
+                'resolved_at': flag.resolved_at,
+            }
+            for flag in claim.flags.all()
+        ],
+        'notes': [
+            {
+                'content': note.content,
+                'note_type': note.get_note_type_display(),
+                'username': note.user.username,
+                'created_at': note.created_at,
+            }
+            for note in claim.notes.all()
+        ],
+        'activity': [
+            {
+                'event_type': event.get_event_type_display(),
+                'summary': event.summary,
+                'username': event.user.username if event.user else 'system',
+                'created_at': event.created_at,
+            }
+            for event in claim.activity.all()
+        ],
+    }
+
+
+def compress(record):
+    return zlib.compress(json.dumps(record, cls=DjangoJSONEncoder).encode())
+
+
+def decompress(payload):
+    """The archived record, with dates, datetimes and amounts parsed back"""
+    record = json.loads(zlib.decompress(bytes(payload)))
+    if 'id' in record:
+        # Archived while the claim number was still the primary key
+        record['claim_number'] = record.pop('id')
+    for key in ('billed_amount', 'paid_amount', 'underpayment'):
+        record[key] = Decimal(record[key])
+    record['discharge_date'] = parse_date(record['discharge_date'])
+    for item in [record, *record['details'], *record['flags'], *record['notes'], *record['activity']]:
+        for key, value in item.items():
+            if key.endswith('_at') and value:
+                item[key] = parse_datetime(value)
+    return record
+
+
+def archive_batch(claim_ids):
+    """Archive one batch of claims (by key) and delete them (and their cascades) from the hot tables
+
+    The claims are locked and read inside the transaction that deletes them.
+    A claim that gained a flag, note, detail or activity row after it was
+    read is left in place for the next run rather than deleting a row the
+    archive never saw.
+    """
+    with transaction.atomic():
+        claims = list(Claim.objects.select_for_update().filter(id__in=claim_ids).prefetch_related(
+            'details',
+            Prefetch('flags', Flag.objects.select_related('user')),
+            Prefetch('notes', Note.objects.select_related('user')),
+            Prefetch('activity', ActivityEvent.objects.select_related('user')),
+        ))
+        archived = {
+            claim.id: ArchivedClaim(
+                claim_number=claim.claim_number,
+                patient_name=claim.patient_name,
+                status=claim.status,
+                insurer_name=claim.insurer_name,
+                discharge_date=claim.discharge_date,
+                payload=compress(claim_record(claim)),
+            )
+            for claim in claims
+        }
+        for model, related_name in CHILD_MODELS:
+            seen = [child.pk for claim in claims for child in getattr(claim, related_name).all()]
+            changed = model.objects.filter(claim_id__in=claim_ids).exclude(pk__in=seen)
+            for claim_id in changed.values_list('claim_id', flat=True):
+                archived.pop(claim_id, None)
+
+        # A claim re-imported after archiving replaces its older archive row
+        ArchivedClaim.objects.filter(claim_number__in=[claim.claim_number for claim in archived.values()]).delete()
+        ArchivedClaim.objects.bulk_create(archived.values())
+        Claim.objects.filter(id__in=list(archived)).delete()
+    return len(archived)
+
+
+def archive_claims(claims_qs, batch_size=None):
+    """Move every claim in claims_qs to the archive, batch_size claims per transaction"""
+    batch_size = batch_size or settings.CLAIMS_BULK_BATCH_SIZE
+    total = 0
+    last_id = 0
+    while True:
+        # Walk by key so claims skipped by archive_batch are not picked up again
+        claim_ids = list(claims_qs.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not claim_ids:
+            return total
+        total += archive_batch(claim_ids)
+        last_id = claim_ids[-1]
+
+
+def get_archived_claim(claim_number):
+    """Decompressed archive record for claim_number, or None"""
+    archived = ArchivedClaim.objects.filter(claim_number=claim_number).only('payload').first()
+    return decompress(archived.payload) if archived else None
+
+
+def search_archive(filters, limit=25):
+    """Archived claims matching the claims list search/status/insurer filters"""
+    archived = ArchivedClaim.objects.defer('payload')
+    if filters['search']:
+        archived = archived.filter(
+            Q(patient_name__icontains=filters['search']) |
+            Q(claim_number__icontains=filters['search'])
+        )
+    if filters['status']:
+        archived = archived.filter(status=filters['status'])
+    if filters['insurer']:
+        archived = archived.filter(insurer_name__icontains=filters['insurer'])
+    return list(archived[:limit])
@@ -0,0 +1,56 @@
+"""Front-end asset bundles.
+
+Development pages load Tailwind's play CDN and the vendor scripts straight
+from their CDNs, with the project script inlined so they do not depend on a
+collectstatic run. ``manage.py build_assets`` instead saves the pinned vendor
+scripts under ``static/vendor/``, compiles the Tailwind classes the templates
+use into one stylesheet and concatenates the scripts into one bundle.
+``collectstatic`` (at deploy time) then gives every file a content-hashed
+name with gzip copies, plus brotli copies when the Brotli package is
+installed, which WhiteNoise serves with far-future cache headers. Pages
+switch to the bundles with ``ASSET_BUNDLES=True``.
+"""
+import re
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+
+# Pinned third-party scripts: static path -> CDN URL
+VENDOR_SCRIPTS = {
+    'vendor/htmx.min.js': 'https://unpkg.com/htmx.org@1.9.10/dist/htmx.min.js',
+    'vendor/htmx-sse.js': 'https://unpkg.com/htmx.org@1.9.10/dist/ext/sse.js',
+    'vendor/chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+    'vendor/alpine.min.js': 'https://unpkg.com/alpinejs@3.13.3/dist/cdn.min.js',
+}
+
+# Alpine initialises once the page has parsed, so it stays a separate deferred script
+DEFERRED_SCRIPTS = ['vendor/alpine.min.js']
+
+TAILWIND_PLAY_CDN = 'https://cdn.tailwindcss.com'
+
+# Bundle -> static sources, in load order. Page templates run inline scripts
+# that call htmx and Chart while parsing, so the bundle is not deferred
+APP_SCRIPT = 'js/app.js'
+SCRIPT_BUNDLE = 'bundles/app.js'
+SCRIPT_SOURCES = ['vendor/htmx.min.js', 'vendor/htmx-sse.js', 'vendor/chart.umd.js', APP_SCRIPT]
+STYLE_BUNDLE = 'bundles/app.css'
+
+# Files Tailwind scans for class names, relative to BASE_DIR
+TAILWIND_CONTENT = ['claims/templates/**/*.html', 'claims/**/*.py', 'static/js/*.js']
+
+COMMENT_LINE = re.compile(r'^\s*//.*$', re.MULTILINE)
+
+
+def minify_js(source):
+    """Drop comment-only lines, indentation and blank lines; line breaks stay so ASI is unaffected"""
+    source = COMMENT_LINE.sub('', source)
+    return '\n'.join(line.strip() for line in source.splitlines() if line.strip())
+
+
+def read_static(path):
+    """Contents of a static source file, found like collectstatic finds it"""
+    with open(finders.find(path), encoding='utf-8') as f:
+        return f.read()
+
+
+cached_read_static = lru_cache(maxsize=None)(read_static)
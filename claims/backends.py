@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """Authenticate with a username or an email address
+
+    One lookup (username, or LOWER(email) via the expression index added in
+    migration 0006) and at most one password hash check per attempt. Also
+    accepts allauth's ``email`` credential, so it replaces both Django's
+    ModelBackend and allauth's backend.
+    """
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        login = username or email or kwargs.get(get_user_model().USERNAME_FIELD)
+        if not login or password is None:
+            return None
+
+        user = self.get_login_user(login)
+        if user is None:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_login_user(self, login):
+        """The user matching login by username, else by a unique email; None if ambiguous"""
+        User = get_user_model()
+        candidates = list(
+            User._default_manager.annotate(email_lower=Lower('email'))
+            .filter(Q(username=login) | Q(email_lower=login.lower()))[:3]
+        )
+        for user in candidates:
+            if user.username == login:
+                return user
+        # Emails are not unique in auth_user; refuse to guess between accounts
+        return candidates[0] if len(candidates) == 1 else None
@@ -0,0 +1,70 @@
+"""Set-based flag, note and resolve actions over many claims.
+
+Each action costs a fixed number of queries regardless of how many claims
+are selected: one to collect the target IDs, then a batched INSERT or a
+single UPDATE plus the batched activity events, all inside one transaction.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import activity
+from .models import Flag, Note
+
+
+def bulk_flag(claims_qs, user, reason):
+    """Flag every claim without an unresolved flag; returns the number flagged"""
+    with transaction.atomic():
+        claim_ids = list(
+            claims_qs.exclude(flags__is_resolved=False).order_by().values_list('id', flat=True)
+        )
+        started = timezone.now()
+        # A claim flagged concurrently since the SELECT is skipped by the
+        # one_active_flag_per_claim constraint instead of failing the batch
+        Flag.objects.bulk_create(
+            [Flag(claim_id=claim_id, user=user, reason=reason) for claim_id in claim_ids],
+            batch_size=settings.CLAIMS_BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts returns no keys, so read back the flags this batch
+        # inserted; skipped claims get no event and are not counted
+        created = list(
+            Flag.objects.filter(
+                claim_id__in=claim_ids, user=user, reason=reason, is_resolved=False, created_at__gte=started,
+            ).values_list('id', 'claim_id')
+        )
+        activity.record_events([
+            activity.build_event(claim_id, 'flag_created', user, reason, flag_id) for flag_id, claim_id in created
+        ])
+    return len(created)
+
+
+def bulk_note(claims_qs, user, content, note_type='user'):
+    """Add the same note to every claim; returns the number annotated"""
+    with transaction.atomic():
+        claim_ids = list(claims_qs.order_by().values_list('id', flat=True))
+        notes = Note.objects.bulk_create(
+            [Note(claim_id=claim_id, user=user, content=content, note_type=note_type) for claim_id in claim_ids],
+            batch_size=settings.CLAIMS_BULK_BATCH_SIZE,
+        )
+        # Note IDs are only returned by backends that support RETURNING
+        activity.record_events([
+            activity.build_event(note.claim_id, 'note_added', user, content, note.pk) for note in notes
+        ])
+    return len(claim_ids)
+
+
+def bulk_resolve(claims_qs, user=None):
+    """Resolve every unresolved flag on the claims in one UPDATE; returns flags resolved"""
+    with transaction.atomic():
+        active_flags = Flag.objects.filter(claim__in=claims_qs.order_by().values('id'), is_resolved=False)
+        flags = list(active_flags.values_list('id', 'claim_id'))
+        resolved = Flag.objects.filter(id__in=[flag_id for flag_id, _ in flags]).update(
+            is_resolved=True,
+            resolved_at=timezone.now(),
+        )
+        activity.record_events([
+            activity.build_event(claim_id, 'flag_resolved', user, 'Flag resolved', flag_id)
+            for flag_id, claim_id in flags
+        ])
+    return resolved
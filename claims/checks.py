@@ -0,0 +1,14 @@
+from django.core.checks import Error, register
+from django.core.exceptions import ImproperlyConfigured
+
+from .aging import get_bucket_edges
+
+
+@register()
+def check_aging_bucket_edges(app_configs, **kwargs):
+    """Reject unusable CLAIMS_AGING_BUCKET_EDGES at startup rather than on the dashboard"""
+    try:
+        get_bucket_edges()
+    except ImproperlyConfigured as e:
+        return [Error(str(e), id='claims.E001')]
+    return []
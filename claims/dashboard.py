@@ -0,0 +1,279 @@
+"""Dashboard analytics sections.
+
+Each section takes the filtered claims queryset and returns the context
+entries it contributes, fully evaluated, so sections are independent of one
+another and can run sequentially (``build_dashboard_context``), concurrently
+on separate database connections (``abuild_dashboard_context``), or one at a
+time behind a lazily loaded panel endpoint (``build_panel_context``).
+"""
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Case, Count, F, FloatField, Sum, When
+from django.utils import timezone
+
+from .aging import aging_breakdown, aging_trend
+from .models import Claim, ClaimDetail
+
+
+STATUSES = ['All', 'Paid', 'Denied', 'Under Review']
+
+
+def get_dashboard_filters(params):
+    """Read the dashboard filter parameters from a GET QueryDict"""
+    return {
+        'from_date': params.get('from_date'),
+        'to_date': params.get('to_date'),
+        'insurer': params.get('insurer'),
+        'status': params.get('status'),
+    }
+
+
+def filter_claims(filters):
+    """Base claims queryset with the dashboard filters applied"""
+    claims_qs = Claim.objects.all()
+
+    # Apply date filters
+    if filters['from_date']:
+        try:
+            from_date_obj = datetime.strptime(filters['from_date'], '%Y-%m-%d').date()
+            claims_qs = claims_qs.filter(discharge_date__gte=from_date_obj)
+        except ValueError:
+            pass  # Invalid date format, ignore filter
+
+    if filters['to_date']:
+        try:
+            to_date_obj = datetime.strptime(filters['to_date'], '%Y-%m-%d').date()
+            claims_qs = claims_qs.filter(discharge_date__lte=to_date_obj)
+        except ValueError:
+            pass  # Invalid date format, ignore filter
+
+    # Apply insurer filter (use icontains for partial matching)
+    if filters['insurer']:
+        claims_qs = claims_qs.filter(insurer_name__icontains=filters['insurer'])
+
+    # Apply status filter (handle case sensitivity and "All" option)
+    status = filters['status']
+    if status and status.lower() != 'all':
+        # Convert to proper case
+        status_map = {
+            'paid': 'Paid',
+            'denied': 'Denied',
+            'under review': 'Under Review'
+        }
+        proper_status = status_map.get(status.lower(), status)
+        claims_qs = claims_qs.filter(status=proper_status)
+
+    return claims_qs
+
+
+def kpi_section(claims_qs):
+    """A) Basic counts and B) payment rates"""
+    total_claims = claims_qs.count()
+    paid_claims = claims_qs.filter(status='Paid').count()
+    denied_claims = claims_qs.filter(status='Denied').count()
+    under_review_claims = claims_qs.filter(status='Under Review').count()
+
+    payment_rate = 0
+    if total_claims > 0:
+        total_billed = claims_qs.aggregate(Sum('billed_amount'))['billed_amount__sum'] or 0
+        total_paid = claims_qs.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0
+        payment_rate = (total_paid / total_billed * 100) if total_billed > 0 else 0
+
+    return {
+        'total_claims': total_claims,
+        'paid_claims': paid_claims,
+        'denied_claims': denied_claims,
+        'under_review_claims': under_review_claims,
+        'payment_rate': round(payment_rate, 1),
+        'denial_rate': round((denied_claims / total_claims * 100) if total_claims > 0 else 0, 1),
+    }
+
+
+def monthly_section(claims_qs):
+    """C) Monthly trends (last 6 months) - Database agnostic"""
+    six_months_ago = timezone.now() - timedelta(days=180)
+
+    # Use database-appropriate date function
+    if connection.vendor == 'postgresql':
+        date_func = "TO_CHAR(discharge_date, 'YYYY-MM-01')"
+    else:
+        date_func = "strftime('%%Y-%%m-01', discharge_date)"
+
+    monthly_data = list(claims_qs.filter(discharge_date__gte=six_months_ago).extra(
+        select={'month': date_func}
+    ).values('month', 'status').annotate(count=Count('id')).order_by('month'))
+
+    # Calculate payment ratio by month
+    payment_ratio_data = list(claims_qs.filter(discharge_date__gte=six_months_ago).extra(
+        select={'month': date_func}
+    ).values('month').annotate(
+        total_billed=Sum('billed_amount'),
+        total_paid=Sum('paid_amount')
+    ).annotate(
+        payment_ratio=Case(
+            When(total_billed__gt=0, then=F('total_paid') * 100.0 / F('total_billed')),
+            default=0,
+            output_field=FloatField()
+        )
+    ).order_by('month'))
+
+    return {
+        'monthly_data': monthly_data,
+        'monthly_data_json': json.dumps([
+            {
+                'month': item['month'],
+                'status': item['status'],
+                'count': item['count']
+            } for item in monthly_data
+        ]),
+        'payment_ratio_json': json.dumps([
+            {
+                'month': item['month'],
+                'payment_ratio': round(float(item['payment_ratio']), 1)
+            } for item in payment_ratio_data
+        ]),
+    }
+
+
+def insurer_section(claims_qs):
+    """D) Insurer breakdown"""
+    insurer_data = list(claims_qs.values('insurer_name', 'status').annotate(count=Count('id')))
+    return {
+        'insurer_data': insurer_data,
+        'insurer_data_json': json.dumps([
+            {
+                'insurer_name': item['insurer_name'],
+                'status': item['status'],
+                'count': item['count']
+            } for item in insurer_data
+        ]),
+    }
+
+
+def cpt_codes_section(claims_qs):
+    """E) CPT codes analysis"""
+    cpt_codes = []
+    for detail in ClaimDetail.objects.filter(claim__in=claims_qs):
+        cpt_codes.extend(detail.cpt_codes_list)
+    top_cpt_codes = Counter(cpt_codes).most_common(10)
+    return {
+        'top_cpt_codes': top_cpt_codes,
+        'top_cpt_codes_json': json.dumps(top_cpt_codes),
+    }
+
+
+def aging_section(claims_qs):
+    """F) Aging analysis (Under Review only) - one grouped query plus snapshot trend"""
+    breakdown = aging_breakdown(claims_qs, status='Under Review')
+    trend = aging_trend(status='Under Review')
+    return {
+        'aging_labels': breakdown['labels'],
+        'aging_buckets': breakdown['totals'],
+        'aging_by_insurer': breakdown['by_insurer'],
+        'aging_json': json.dumps(breakdown),
+        'aging_trend_json': json.dumps([
+            {
+                'date': item['snapshot_date'].isoformat(),
+                'bucket': item['bucket'],
+                'count': item['claim_count']
+            } for item in trend
+        ]),
+    }
+
+
+def top_underpayment_section(claims_qs):
+    """I) Top underpayment (Paid claims only)"""
+    top_underpayment = claims_qs.filter(status='Paid', underpayment__gt=0).order_by('-underpayment')[:10]
+    return {'top_underpayment': list(top_underpayment)}
+
+
+def filter_options_section(claims_qs):
+    """K) Unique insurers and statuses for filters - ALWAYS from ALL claims, not filtered"""
+    all_insurers = Claim.objects.values_list('insurer_name', flat=True).distinct().order_by('insurer_name')
+    return {
+        'insurers': list(all_insurers),
+        'statuses': STATUSES,
+    }
+
+
+SECTIONS = {
+    'kpis': kpi_section,
+    'monthly': monthly_section,
+    'insurers': insurer_section,
+    'cpt_codes': cpt_codes_section,
+    'aging': aging_section,
+    'top_underpayment': top_underpayment_section,
+    'filter_options': filter_options_section,
+}
+
+
+# Sections needed for first paint; everything else is a lazily loaded panel
+HEADER_SECTIONS = ('kpis', 'filter_options')
+
+PANEL_TEMPLATES = {
+    'monthly': 'claims/partials/dashboard_monthly.html',
+    'insurers': 'claims/partials/dashboard_insurers.html',
+    'cpt_codes': 'claims/partials/dashboard_cpt_codes.html',
+    'aging': 'claims/partials/dashboard_aging.html',
+    'top_underpayment': 'claims/partials/dashboard_top_underpayment.html',
+}
+
+
+def build_header_context(filters):
+    """Context for the KPI header and filter bar only"""
+    return build_dashboard_context(filters, {name: SECTIONS[name] for name in HEADER_SECTIONS})
+
+
+def build_panel_context(panel, filters):
+    """Context for a single lazily loaded panel"""
+    return build_dashboard_context(filters, {panel: SECTIONS[panel]})
+
+
+def build_dashboard_context(filters, sections=SECTIONS):
+    """Run the dashboard sections one after another on the current connection"""
+    claims_qs = filter_claims(filters)
+    context = {'current_filters': filters}
+    for section in sections.values():
+        context.update(section(claims_qs))
+    return context
+
+
+def _run_section_in_thread(section, filters):
+    """Run one section on this worker thread's own connection, then release it"""
+    try:
+        return section(filter_claims(filters))
+    finally:
+        connections.close_all()
+
+
+async def abuild_dashboard_context(filters, sections=SECTIONS, max_concurrency=None):
+    """Run the dashboard sections concurrently, each on a separate connection
+
+    At most ``max_concurrency`` sections (DASHBOARD_MAX_CONCURRENCY by default)
+    hold a connection at any time, so wall-clock latency approaches the slowest
+    section rather than the sum without flooding the database. With a limit
+    of 1 the sections run one after another on the request's connection.
+    """
+    if max_concurrency is None:
+        max_concurrency = settings.DASHBOARD_MAX_CONCURRENCY
+    if max_concurrency <= 1:
+        return await sync_to_async(build_dashboard_context)(filters, sections)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(section):
+        async with semaphore:
+            # thread_sensitive=False gives each section its own thread, and
+            # Django connections are per thread
+            return await sync_to_async(_run_section_in_thread, thread_sensitive=False)(section, filters)
+
+    results = await asyncio.gather(*(run(section) for section in sections.values()))
+    context = {'current_filters': filters}
+    for result in results:
+        context.update(result)
+    return context
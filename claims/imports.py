@@ -0,0 +1,307 @@
+"""Import validation for claims and claim details files.
+
+Rows are validated a chunk at a time before anything is written: parsing and
+range checks run in memory, and the only database work is one set-based
+lookup per chunk (known claim IDs for details). Valid details are then
+written with bulk inserts and updates rather than a query per row. Bad rows are skipped and
+written to a rejected-rows CSV with their line number and reasons, so a large
+file with a few bad rows neither aborts nor falls back to per-row queries.
+"""
+import csv
+import os
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, models
+
+from .models import Claim, ClaimDetail
+
+
+STATUS_LOOKUP = {value.lower(): value for value, label in Claim._meta.get_field('status').choices}
+
+DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S',
+)
+
+ORPHAN_REASON = 'unknown claim id {claim_id!r}'
+
+# Largest value a DecimalField(max_digits=12, decimal_places=2) can hold
+MAX_AMOUNT = Decimal('9999999999.99')
+
+
+def chunked(rows, size=None):
+    """Yield lists of (line_number, row); line numbers count the header as line 1"""
+    size = size or settings.IMPORT_CHUNK_SIZE
+    numbered = enumerate(rows, start=2)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_amount(value):
+    """Decimal from a number or a '$1,234.50' style string, or None if unparseable"""
+    if isinstance(value, (int, float)):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    try:
+        amount = Decimal(value.replace('$', '').replace(',', '').strip())
+    except InvalidOperation:
+        return None
+    return amount.quantize(Decimal('0.01')) if amount.is_finite() else None
+
+
+def parse_date(value):
+    """Date from one of DATE_FORMATS, or None if unparseable"""
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def row_claim_id(row, *keys):
+    """Claim ID from the first present key, as a stripped string ('' if missing)"""
+    for key in keys:
+        value = row.get(key)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+
+def validate_claim_chunk(chunk):
+    """Split a chunk of claim rows into (valid, rejected)
+
+    valid: dicts of cleaned model values plus 'line', 'cpt_codes' and
+    'denial_reason'; rejected: (line, row, reasons) tuples.
+    """
+    valid = []
+    rejected = []
+    seen_ids = set()
+    for line, row in chunk:
+        reasons = []
+
+        claim_id = row_claim_id(row, 'id', 'claim_id')
+        if not claim_id:
+            reasons.append('missing claim id')
+        elif len(claim_id) > Claim._meta.get_field('claim_number').max_length:
+            reasons.append('claim id too long')
+        elif claim_id in seen_ids:
+            reasons.append('duplicate claim id in chunk')
+
+        status = STATUS_LOOKUP.get(str(row.get('status') or '').strip().lower())
+        if status is None:
+            reasons.append(f"unknown status {row.get('status')!r}")
+
+        billed = parse_amount(row.get('billed_amount'))
+        paid = parse_amount(row.get('paid_amount'))
+        if billed is None:
+            reasons.append('unparseable billed_amount')
+        if paid is None:
+            reasons.append('unparseable paid_amount')
+        if billed is not None and not Decimal(0) <= billed <= MAX_AMOUNT:
+            reasons.append('billed_amount out of range')
+        if paid is not None and not Decimal(0) <= paid <= MAX_AMOUNT:
+            reasons.append('paid_amount out of range')
+        if billed is not None and paid is not None and paid > billed:
+            reasons.append('paid_amount exceeds billed_amount')
+
+        discharge_date = parse_date(row.get('discharge_date'))
+        if discharge_date is None:
+            reasons.append('unparseable discharge_date')
+
+        patient_name = str(row.get('patient_name') or '').strip()
+        if not patient_name:
+            reasons.append('missing patient_name')
+        insurer_name = str(row.get('insurer_name') or '').strip()
+        if not insurer_name:
+            reasons.append('missing insurer_name')
+
+        if reasons:
+            rejected.append((line, row, reasons))
+            continue
+
+        seen_ids.add(claim_id)
+        valid.append({
+            'line': line,
+            'claim_number': claim_id,
+            'patient_name': patient_name,
+            'billed_amount': billed,
+            'paid_amount': paid,
+            'status': status,
+            'insurer_name': insurer_name,
+            'discharge_date': discharge_date,
+            'cpt_codes': str(row.get('cpt_codes') or ''),
+            'denial_reason': str(row.get('denial_reason') or '') or None,
+        })
+    return valid, rejected
+
+
+def load_claim_ids():
+    """Every claim ID mapped to its key, for loaders that resolve IDs in memory"""
+    return dict(
+        Claim.objects.values_list('claim_number', 'id').iterator(chunk_size=settings.IMPORT_CHUNK_SIZE)
+    )
+
+
+def validate_detail_chunk(chunk, known_ids=None):
+    """Split a chunk of claim detail rows into (valid, rejected)
+
+    Claim IDs are resolved to keys with a single query for the whole chunk,
+    or against known_ids (see load_claim_ids) without querying. Valid rows
+    carry the key as 'claim_id' and the original ID as 'claim_number'.
+    """
+    candidates = []
+    rejected = []
+    for line, row in chunk:
+        claim_id = row_claim_id(row, 'claim_id', 'id')
+        if not claim_id:
+            rejected.append((line, row, ['missing claim id']))
+        else:
+            candidates.append((line, row, claim_id))
+
+    if known_ids is None:
+        known_ids = dict(
+            Claim.objects.filter(claim_number__in={claim_id for _, _, claim_id in candidates})
+            .values_list('claim_number', 'id')
+        )
+
+    valid = []
+    for line, row, claim_id in candidates:
+        if claim_id not in known_ids:
+            rejected.append((line, row, [ORPHAN_REASON.format(claim_id=claim_id)]))
+            continue
+        valid.append({
+            'line': line,
+            'claim_id': known_ids[claim_id],
+            'claim_number': claim_id,
+            'cpt_codes': str(row.get('cpt_codes') or ''),
+            'denial_reason': str(row.get('denial_reason') or '') or None,
+        })
+    return valid, rejected
+
+
+class RejectedRowsWriter:
+    """CSV of rejected rows (line, reasons, original columns); created on first reject"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, rejected):
+        for line, row, reasons in rejected:
+            if self._writer is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = open(self.path, 'w', newline='')
+                self._writer = csv.DictWriter(
+                    self._file,
+                    fieldnames=['line', 'reasons', *row.keys()],
+                    restval='',
+                    extrasaction='ignore',
+                )
+                self._writer.writeheader()
+            self._writer.writerow({**row, 'line': line, 'reasons': '; '.join(reasons)})
+            self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def orphan_ids(rejected):
+    """Claim IDs of detail rows rejected only because their claim does not exist"""
+    return [
+        row_claim_id(row, 'claim_id', 'id')
+        for line, row, reasons in rejected
+        if reasons == [ORPHAN_REASON.format(claim_id=row_claim_id(row, 'claim_id', 'id'))]
+    ]
+
+
+def upsert_details(rows):
+    """Bulk insert/update one chunk of validated detail rows; returns (created, updated)
+
+    One query finds the chunk's existing details; new ones are inserted with
+    bulk_create and changed ones rewritten with one bulk_update. Repeated
+    claim IDs within the chunk keep the last row.
+    """
+    latest = {row['claim_id']: row for row in rows}
+    existing = {}
+    for detail in ClaimDetail.objects.filter(claim_id__in=latest).order_by('id'):
+        # Claims normally have one detail; like claim.details.first(), keep the oldest
+        existing.setdefault(detail.claim_id, detail)
+
+    to_create = []
+    to_update = []
+    for claim_id, row in latest.items():
+        detail = existing.get(claim_id)
+        if detail is None:
+            to_create.append(ClaimDetail(
+                claim_id=claim_id,
+                cpt_codes=row['cpt_codes'],
+                denial_reason=row['denial_reason'],
+            ))
+        elif (detail.cpt_codes, detail.denial_reason) != (row['cpt_codes'], row['denial_reason']):
+            detail.cpt_codes = row['cpt_codes']
+            detail.denial_reason = row['denial_reason']
+            to_update.append(detail)
+
+    batch_size = settings.CLAIMS_BULK_BATCH_SIZE
+    ClaimDetail.objects.bulk_create(to_create, batch_size=batch_size)
+    ClaimDetail.objects.bulk_update(to_update, ['cpt_codes', 'denial_reason'], batch_size=batch_size)
+    return len(to_create), len(to_update)
+
+
+def cascade_models(model):
+    """model plus every model whose rows are cascade-deleted with it"""
+    found = [model]
+    for related in model._meta.related_objects:
+        if related.on_delete is models.CASCADE and related.related_model not in found:
+            found.extend(m for m in cascade_models(related.related_model) if m not in found)
+    return found
+
+
+def delete_all(*model_classes):
+    """Empty the tables of model_classes (and their cascades) with one DELETE per table
+
+    Call it inside the transaction that reloads the data. DELETE only takes
+    row locks, so other connections keep reading the old rows until the
+    reload commits. TRUNCATE would be faster, but on PostgreSQL it takes an
+    ACCESS EXCLUSIVE lock that blocks every read of the tables for the whole
+    reload. No rows are loaded into Python and no delete signals are sent.
+    """
+    tables = []
+    for model in model_classes:
+        tables.extend(m._meta.db_table for m in cascade_models(model) if m._meta.db_table not in tables)
+    with connection.cursor() as cursor:
+        # Cascaded tables come after the tables they reference; delete them first
+        for table in reversed(tables):
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(table)}')
+    return tables
+
+
+def default_rejects_path(file_path):
+    """'data/claims.csv' -> 'claims.rejected.csv' in IMPORT_REJECTS_DIR, not next to the source"""
+    stem = os.path.basename(str(file_path)).rsplit('.', 1)[0] if file_path else 'rejected_rows'
+    return os.path.join(settings.IMPORT_REJECTS_DIR, f'{stem}.rejected.csv')
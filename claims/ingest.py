@@ -0,0 +1,275 @@
+"""Bulk ingestion backends for the import commands.
+
+The loaders validate a chunk of rows (see ``imports``) and hand the valid
+ones to an ingestor, which writes the whole chunk in one transaction:
+
+* ``CopyIngestor`` (PostgreSQL) streams the chunk into a temporary staging
+  table with ``COPY FROM STDIN`` and merges it into ``claims_claim`` with a
+  single ``INSERT ... ON CONFLICT DO UPDATE``; missing details are added
+  with one ``INSERT ... SELECT``.
+* ``ExecutemanyIngestor`` (SQLite and anything else) finds the existing rows
+  with one query and writes inserts and updates with ``executemany``.
+
+Both bypass ``Claim.save()``, so ``underpayment`` is computed here.
+"""
+import csv
+import io
+from abc import ABC, abstractmethod
+
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from .imports import upsert_details
+from .models import Claim, ClaimDetail
+from .partitions import is_partitioned
+
+
+# Claim columns written from a validated row (see imports.validate_claim_chunk)
+CLAIM_COLUMNS = (
+    'claim_number',
+    'patient_name',
+    'billed_amount',
+    'paid_amount',
+    'underpayment',
+    'status',
+    'insurer_name',
+    'discharge_date',
+)
+
+DETAIL_COLUMNS = ('cpt_codes', 'denial_reason')
+
+
+def claim_values(row):
+    """Column values for one validated claim row, with underpayment filled in"""
+    row = dict(row, underpayment=max(0, row['billed_amount'] - row['paid_amount']))
+    return [row[column] for column in CLAIM_COLUMNS]
+
+
+class Ingestor(ABC):
+    """Writes validated rows a chunk at a time on one database connection"""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.connection = connections[using]
+        self.quote = self.connection.ops.quote_name
+
+    def merge_claims(self, rows):
+        """Insert or update one chunk of claims, adding details for claims without one
+
+        Returns the keys of the claims created and updated, as (created_ids, updated_ids).
+        """
+        if not rows:
+            return [], []
+        with transaction.atomic(using=self.using):
+            return self._merge_claims(rows)
+
+    def merge_details(self, rows):
+        """Insert or update the details of one chunk; returns (created, updated)"""
+        if not rows:
+            return 0, 0
+        with transaction.atomic(using=self.using):
+            return self._merge_details(rows)
+
+    @abstractmethod
+    def _merge_claims(self, rows):
+        """Write one non-empty chunk of claims inside merge_claims' transaction"""
+
+    @abstractmethod
+    def _merge_details(self, rows):
+        """Write one non-empty chunk of details inside merge_details' transaction"""
+
+
+class ExecutemanyIngestor(Ingestor):
+    """Portable fallback: one existence query, then batched INSERT/UPDATE statements"""
+
+    def _prep(self, model, columns, values):
+        fields = [model._meta.get_field(column) for column in columns]
+        return [field.get_db_prep_save(value, self.connection) for field, value in zip(fields, values)]
+
+    def _merge_claims(self, rows):
+        claim_table = self.quote(Claim._meta.db_table)
+        detail_table = self.quote(ClaimDetail._meta.db_table)
+        now = timezone.now()
+        claims = Claim.objects.using(self.using)
+        numbers = [row['claim_number'] for row in rows]
+        existing = dict(claims.filter(claim_number__in=numbers).values_list('claim_number', 'id'))
+        with_details = set(
+            ClaimDetail.objects.using(self.using)
+            .filter(claim_id__in=existing.values())
+            .values_list('claim_id', flat=True)
+        )
+
+        inserts = []
+        updates = []
+        for row in rows:
+            values = self._prep(Claim, CLAIM_COLUMNS + ('updated_at',), claim_values(row) + [now])
+            if row['claim_number'] in existing:
+                # SET every column but claim_number, then WHERE claim_number = ...
+                updates.append(values[1:] + values[:1])
+            else:
+                inserts.append(values + self._prep(Claim, ('created_at',), [now]))
+
+        insert_columns = CLAIM_COLUMNS + ('updated_at', 'created_at')
+        set_columns = CLAIM_COLUMNS[1:] + ('updated_at',)
+        detail_columns = ('claim_id',) + DETAIL_COLUMNS + ('created_at',)
+
+        with self.connection.cursor() as cursor:
+            if inserts:
+                cursor.executemany(
+                    f'INSERT INTO {claim_table} ({", ".join(map(self.quote, insert_columns))}) '
+                    f'VALUES ({", ".join(["%s"] * len(insert_columns))})',
+                    inserts,
+                )
+            if updates:
+                cursor.executemany(
+                    f'UPDATE {claim_table} SET {", ".join(f"{self.quote(c)} = %s" for c in set_columns)} '
+                    f'WHERE {self.quote("claim_number")} = %s',
+                    updates,
+                )
+            created = {}
+            if inserts:
+                # executemany cannot return the new keys; read them back in one query
+                created = dict(
+                    claims.filter(claim_number__in=[n for n in numbers if n not in existing])
+                    .values_list('claim_number', 'id')
+                )
+            keys = {**existing, **created}
+            details = [
+                self._prep(
+                    ClaimDetail, detail_columns,
+                    [keys[row['claim_number']], row['cpt_codes'], row['denial_reason'], now],
+                )
+                for row in rows
+                if keys[row['claim_number']] not in with_details
+            ]
+            if details:
+                cursor.executemany(
+                    f'INSERT INTO {detail_table} ({", ".join(map(self.quote, detail_columns))}) '
+                    f'VALUES ({", ".join(["%s"] * len(detail_columns))})',
+                    details,
+                )
+
+        return list(created.values()), list(existing.values())
+
+    def _merge_details(self, rows):
+        return upsert_details(rows)
+
+
+class CopyIngestor(Ingestor):
+    """PostgreSQL: COPY into a temporary staging table, then merge with set-based SQL"""
+
+    CLAIM_STAGING = 'claims_claim_staging'
+    DETAIL_STAGING = 'claims_claimdetail_staging'
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        super().__init__(using)
+        # See claims.partitions; the conflict target differs once partitioned
+        self.partitioned = is_partitioned(using)
+
+    def _stage(self, cursor, staging, source_sql, columns, rows):
+        """(Re)fill a temporary table shaped like source_sql with rows via COPY"""
+        # Typed like the real columns; dropped when the import transaction ends
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS {source_sql} WITH NO DATA'
+        )
+        cursor.execute(f'TRUNCATE {staging}')
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for values in rows:
+            writer.writerow(r'\N' if value is None else value for value in values)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+    def _merge_claims(self, rows):
+        claim_table = self.quote(Claim._meta.db_table)
+        detail_table = self.quote(ClaimDetail._meta.db_table)
+        columns = [self.quote(column) for column in CLAIM_COLUMNS + DETAIL_COLUMNS]
+        claim_columns = ', '.join(columns[:len(CLAIM_COLUMNS)])
+        now = timezone.now()
+
+        with self.connection.cursor() as cursor:
+            self._stage(
+                cursor,
+                self.CLAIM_STAGING,
+                # Claim columns plus the two detail columns, typed from both tables
+                f'SELECT {", ".join(f"c.{column}" for column in columns[:len(CLAIM_COLUMNS)])}, '
+                f'd.{self.quote("cpt_codes")}, d.{self.quote("denial_reason")} '
+                f'FROM {claim_table} c CROSS JOIN {detail_table} d',
+                columns,
+                (claim_values(row) + [row['cpt_codes'], row['denial_reason']] for row in rows),
+            )
+            conflict_target = '"claim_number"'
+            if self.partitioned:
+                # Claim numbers are only unique with discharge_date there; move
+                # rows whose month changed first (keeping their keys) so the
+                # upsert below matches them
+                cursor.execute(
+                    f'UPDATE {claim_table} c SET "discharge_date" = s."discharge_date" '
+                    f'FROM {self.CLAIM_STAGING} s '
+                    f'WHERE c."claim_number" = s."claim_number" AND c."discharge_date" <> s."discharge_date"'
+                )
+                conflict_target = '"claim_number", "discharge_date"'
+            updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns[1:len(CLAIM_COLUMNS)])
+            # xmax is 0 only for rows this statement inserted
+            cursor.execute(
+                f'INSERT INTO {claim_table} ({claim_columns}, "created_at", "updated_at") '
+                f'SELECT {claim_columns}, %s, %s FROM {self.CLAIM_STAGING} '
+                f'ON CONFLICT ({conflict_target}) DO UPDATE SET {updates}, "updated_at" = EXCLUDED."updated_at" '
+                f'RETURNING "id", (xmax = 0)',
+                [now, now],
+            )
+            merged = cursor.fetchall()
+            cursor.execute(
+                f'INSERT INTO {detail_table} ("claim_id", "cpt_codes", "denial_reason", "created_at") '
+                f'SELECT c."id", s."cpt_codes", s."denial_reason", %s FROM {self.CLAIM_STAGING} s '
+                f'JOIN {claim_table} c ON c."claim_number" = s."claim_number" '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {detail_table} d WHERE d."claim_id" = c."id")',
+                [now],
+            )
+
+        created_ids = [claim_id for claim_id, inserted in merged if inserted]
+        updated_ids = [claim_id for claim_id, inserted in merged if not inserted]
+        return created_ids, updated_ids
+
+    def _merge_details(self, rows):
+        detail_table = self.quote(ClaimDetail._meta.db_table)
+        # Repeated claim IDs within the chunk keep the last row
+        latest = {row['claim_id']: row for row in rows}
+
+        with self.connection.cursor() as cursor:
+            self._stage(
+                cursor,
+                self.DETAIL_STAGING,
+                f'SELECT "claim_id", "cpt_codes", "denial_reason" FROM {detail_table}',
+                ['"claim_id"', '"cpt_codes"', '"denial_reason"'],
+                ([claim_id, row['cpt_codes'], row['denial_reason']] for claim_id, row in latest.items()),
+            )
+            # Like claim.details.first(), only the oldest detail of a claim is updated
+            cursor.execute(
+                f'UPDATE {detail_table} d SET "cpt_codes" = s."cpt_codes", "denial_reason" = s."denial_reason" '
+                f'FROM (SELECT DISTINCT ON (e."claim_id") e."id", t."cpt_codes", t."denial_reason" '
+                f'FROM {self.DETAIL_STAGING} t JOIN {detail_table} e ON e."claim_id" = t."claim_id" '
+                f'ORDER BY e."claim_id", e."id") s '
+                f'WHERE d."id" = s."id" '
+                f'AND (d."cpt_codes", d."denial_reason") IS DISTINCT FROM (s."cpt_codes", s."denial_reason")'
+            )
+            updated = cursor.rowcount
+            cursor.execute(
+                f'INSERT INTO {detail_table} ("claim_id", "cpt_codes", "denial_reason", "created_at") '
+                f'SELECT t."claim_id", t."cpt_codes", t."denial_reason", %s FROM {self.DETAIL_STAGING} t '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {detail_table} d WHERE d."claim_id" = t."claim_id")',
+                [timezone.now()],
+            )
+            created = cursor.rowcount
+        return created, updated
+
+
+def get_ingestor(using=DEFAULT_DB_ALIAS):
+    """COPY-based ingestion on PostgreSQL, executemany everywhere else"""
+    if connections[using].vendor == 'postgresql':
+        return CopyIngestor(using)
+    return ExecutemanyIngestor(using)
@@ -0,0 +1,133 @@
+"""Live activity updates over server-sent events.
+
+Activity events are published to an in-process broker once their
+transaction commits, and every open SSE stream in this process receives the
+ones for the claims it follows. With several workers, set
+LIVE_UPDATES_POLL_INTERVAL to have streams poll the activity table for new
+rows instead, so events written by any worker are delivered.
+"""
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from .models import ActivityEvent
+
+
+class Subscription:
+    """One open stream: an asyncio queue on the stream's event loop"""
+
+    def __init__(self, claim_ids=None):
+        self.claim_ids = set(claim_ids) if claim_ids else None
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.LIVE_UPDATES_QUEUE_SIZE)
+
+    def wants(self, event):
+        return self.claim_ids is None or event.claim_id in self.claim_ids
+
+    def push(self, events):
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer; it catches up from the DB on reconnect
+                break
+
+
+class Broker:
+    """In-process pub/sub; publish() may be called from any thread"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, claim_ids=None):
+        subscription = Subscription(claim_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            matching = [event for event in events if subscription.wants(event)]
+            if matching:
+                subscription.loop.call_soon_threadsafe(subscription.push, matching)
+
+
+broker = Broker()
+
+
+def events_after(last_id, claim_ids=None, limit=None):
+    """Committed events with id > last_id, oldest first"""
+    events = ActivityEvent.objects.filter(id__gt=last_id).select_related('user', 'claim').order_by('id')
+    if claim_ids:
+        events = events.filter(claim_id__in=claim_ids)
+    return list(events[:limit or settings.LIVE_UPDATES_QUEUE_SIZE])
+
+
+def latest_event_id():
+    """Highest event id so far (0 if none); new streams start after it"""
+    return ActivityEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def format_event(event, show_claim):
+    """One SSE message carrying the rendered timeline row"""
+    html = render_to_string('claims/partials/activity_event.html', {
+        'event': event,
+        'show_claim': show_claim,
+    })
+    lines = [f'id: {event.pk}'] if event.pk else []
+    lines.append('event: activity')
+    lines.extend(f'data: {line}' for line in html.strip().splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream_events(claim_ids=None, last_event_id=None):
+    """Yield SSE messages until LIVE_UPDATES_MAX_AGE; EventSource then reconnects"""
+    show_claim = not claim_ids
+    poll_interval = settings.LIVE_UPDATES_POLL_INTERVAL
+    heartbeat = settings.LIVE_UPDATES_HEARTBEAT
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_UPDATES_MAX_AGE
+    render = sync_to_async(format_event)
+
+    if last_event_id is None:
+        last_event_id = await sync_to_async(latest_event_id)()
+    subscription = None if poll_interval else broker.subscribe(claim_ids)
+
+    try:
+        yield f'retry: {settings.LIVE_UPDATES_RETRY_MS}\n\n'
+        # Replay anything missed since the client's Last-Event-ID
+        for event in await sync_to_async(events_after)(last_event_id, claim_ids):
+            last_event_id = event.pk
+            yield await render(event, show_claim)
+
+        while loop.time() < deadline:
+            if subscription is None:
+                # Cross-worker mode: pick up rows written by any process
+                await asyncio.sleep(poll_interval)
+                events = await sync_to_async(events_after)(last_event_id, claim_ids)
+                if not events:
+                    yield ': keep-alive\n\n'
+            else:
+                try:
+                    events = [await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)]
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+            for event in events:
+                if event.pk and event.pk <= last_event_id:
+                    continue
+                last_event_id = event.pk or last_event_id
+                yield await render(event, show_claim)
+    finally:
+        if subscription is not None:
+            broker.unsubscribe(subscription)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from claims.archive import archivable_claims, archive_claims
+
+
+class Command(BaseCommand):
+    help = 'Move old closed claims (with details, flags, notes and activity) into the compressed archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Archive claims discharged more than this many days ago (default: CLAIMS_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--status', action='append', dest='statuses',
+                            help='Status to archive; repeat for several (default: CLAIMS_ARCHIVE_STATUSES)')
+        parser.add_argument('--batch-size', type=int, help='Claims per transaction (default: CLAIMS_BULK_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many claims would be archived')
+
+    def handle(self, *args, **options):
+        claims = archivable_claims(days=options['days'], statuses=options['statuses'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{claims.count()} claims would be archived')
+            return
+
+        archived = archive_claims(claims, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} claims'))
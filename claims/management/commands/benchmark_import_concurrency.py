@@ -0,0 +1,129 @@
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from claims import imports, ingest
+from claims.models import Claim
+
+
+BENCH_PREFIX = 'BENCH-'
+
+
+class Command(BaseCommand):
+    help = 'Measure read latency on the claims table while an import is writing (synthetic BENCH- claims, removed afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Synthetic claims to import')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+        parser.add_argument('--chunk-size', type=int, help='Rows per write transaction (default: IMPORT_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        if Claim.objects.filter(claim_number__startswith=BENCH_PREFIX).exists():
+            raise CommandError(f'Claims with the {BENCH_PREFIX} prefix already exist; remove them first')
+
+        self.done = threading.Event()
+        self.write_times = []
+        self.read_times = []
+        self.errors = []
+        lock = threading.Lock()
+
+        readers = [
+            threading.Thread(target=self.read_loop, args=(lock,))
+            for _ in range(options['readers'])
+        ]
+        writer = threading.Thread(target=self.write_loop, args=(options['rows'], options['chunk_size']))
+
+        started = time.perf_counter()
+        for thread in readers:
+            thread.start()
+        writer.start()
+        writer.join()
+        elapsed = time.perf_counter() - started
+        self.done.set()
+        for thread in readers:
+            thread.join()
+
+        _, deleted = Claim.objects.filter(claim_number__startswith=BENCH_PREFIX).delete()
+        self.report(options['rows'], elapsed, deleted.get(Claim._meta.label, 0))
+
+    def write_loop(self, rows, chunk_size):
+        """Import synthetic claims in short chunked transactions, like load_claims_data"""
+        ingestor = ingest.get_ingestor()
+        today = date.today()
+        claims = (
+            {
+                'line': n + 2,
+                'claim_number': f'{BENCH_PREFIX}{n:08d}',
+                'patient_name': f'Benchmark Patient {n}',
+                'billed_amount': Decimal('1000.00'),
+                'paid_amount': Decimal(n % 1000),
+                'status': ('Paid', 'Denied', 'Under Review')[n % 3],
+                'insurer_name': f'Insurer {n % 7}',
+                'discharge_date': today - timedelta(days=n % 365),
+                'cpt_codes': '99213',
+                'denial_reason': None,
+            }
+            for n in range(rows)
+        )
+        try:
+            for chunk in imports.chunked(claims, chunk_size):
+                started = time.perf_counter()
+                ingestor.merge_claims([row for line, row in chunk])
+                self.write_times.append(time.perf_counter() - started)
+        except Exception as e:
+            self.errors.append(f'writer: {e}')
+        finally:
+            connections.close_all()
+
+    def read_loop(self, lock):
+        """Run the claims list queries until the import finishes, timing each round"""
+        try:
+            while not self.done.is_set():
+                started = time.perf_counter()
+                try:
+                    claims = Claim.objects.filter(status='Under Review').order_by('-discharge_date')
+                    claims.count()
+                    list(claims[:25])
+                except Exception as e:
+                    with lock:
+                        self.errors.append(f'reader: {e}')
+                    continue
+                with lock:
+                    self.read_times.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+
+    def report(self, rows, elapsed, deleted):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            self.stdout.write(f'SQLite journal mode: {journal_mode}')
+
+        self.stdout.write(
+            f'Imported {rows} rows in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s) '
+            f'over {len(self.write_times)} transactions; longest {max(self.write_times, default=0) * 1000:.1f}ms'
+        )
+        if self.read_times:
+            times = sorted(self.read_times)
+            p95 = times[int(len(times) * 0.95) - 1] if len(times) >= 20 else times[-1]
+            self.stdout.write(
+                f'Reads during import: {len(times)}, '
+                f'median {statistics.median(times) * 1000:.1f}ms, '
+                f'p95 {p95 * 1000:.1f}ms, max {times[-1] * 1000:.1f}ms'
+            )
+        else:
+            self.stdout.write(self.style.WARNING('No reads completed during the import'))
+        self.stdout.write(f'Removed {deleted} benchmark claims')
+
+        if self.errors:
+            for error in sorted(set(self.errors)):
+                self.stdout.write(self.style.ERROR(error))
+            self.stdout.write(self.style.ERROR(f'{len(self.errors)} queries failed'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No query failed or hit "database is locked"'))
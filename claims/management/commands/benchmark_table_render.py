@@ -0,0 +1,109 @@
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from claims.models import Claim
+from claims.templatetags.currency_filters import currency, format_currency
+
+
+TEMPLATE = 'claims/partials/claims_table.html'
+
+
+class Command(BaseCommand):
+    help = 'Time rendering the claims table partial for one page of synthetic claims (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Claims on the rendered page')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed renders after the first one')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        context = self.context(rows)
+        request = RequestFactory().get('/claims/', HTTP_HX_REQUEST='true')
+
+        # Start cold so the first render includes loading and compiling
+        for engine in engines.all():
+            for loader in engine.engine.template_loaders:
+                if hasattr(loader, 'reset'):
+                    loader.reset()
+        format_currency.cache_clear()
+
+        started = time.perf_counter()
+        render_to_string(TEMPLATE, context, request)
+        first = time.perf_counter() - started
+
+        times = []
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            render_to_string(TEMPLATE, context, request)
+            times.append(time.perf_counter() - started)
+        times.sort()
+
+        self.stdout.write(f'{TEMPLATE}, {rows} rows')
+        self.stdout.write(f'First render (load and compile): {first * 1000:.2f}ms')
+        self.stdout.write(
+            f'Cached renders: {len(times)}, median {statistics.median(times) * 1000:.2f}ms, '
+            f'p95 {times[int(len(times) * 0.95) - 1] * 1000:.2f}ms'
+        )
+        info = format_currency.cache_info()
+        self.stdout.write(f'currency memo: {info.hits} hits, {info.misses} misses')
+        self.filter_report(context['claims'])
+
+    def context(self, rows):
+        today = date.today()
+        claims = []
+        for n in range(rows):
+            claim = Claim(
+                id=n + 1,
+                claim_number=f'{30000 + n}',
+                patient_name=f'Benchmark Patient {n}',
+                billed_amount=Decimal(f'{1000 + n * 37}.50'),
+                paid_amount=Decimal(f'{n * 11}.25'),
+                status=('Paid', 'Denied', 'Under Review')[n % 3],
+                insurer_name=f'Insurer {n % 7}',
+                discharge_date=today - timedelta(days=n),
+            )
+            claim.underpayment = claim.underpayment_amount
+            claim.has_unresolved_flags = n % 5 == 0
+            claim.has_resolved_flags = n % 7 == 0
+            claims.append(claim)
+        return {
+            'claims': Paginator(claims, rows).page(1),
+            'search_query': '',
+            'status_filter': '',
+            'insurer_filter': '',
+            'min_underpayment': '',
+            'sort': '',
+            'per_page': rows,
+            'filter_query': f'per_page={rows}',
+            'archived_matches': [],
+        }
+
+    def filter_report(self, claims_page):
+        """The amounts of one page through currency, against the old float formatting"""
+        amounts = [
+            amount
+            for claim in claims_page
+            for amount in (claim.billed_amount, claim.paid_amount, claim.underpayment)
+        ]
+        rounds = 100
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for amount in amounts:
+                currency(amount)
+        memo = (time.perf_counter() - started) / (rounds * len(amounts))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for amount in amounts:
+                f'${float(amount):,.2f}'
+        baseline = (time.perf_counter() - started) / (rounds * len(amounts))
+        self.stdout.write(
+            f'currency filter: {memo * 1e6:.2f}us per value (float formatting: {baseline * 1e6:.2f}us)'
+        )
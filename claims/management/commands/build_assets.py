@@ -0,0 +1,92 @@
+import shlex
+import subprocess
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from claims import assets
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the static asset bundles: save the pinned vendor scripts, compile Tailwind '
+        'and concatenate the scripts. Run collectstatic afterwards and set ASSET_BUNDLES=True'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fetch', action='store_true', help='Download vendor scripts missing from static/vendor/')
+        parser.add_argument('--refetch', action='store_true', help='Download every vendor script again')
+        parser.add_argument(
+            '--tailwind', default='npx --yes tailwindcss@3.4.1',
+            help='Tailwind CLI command (the standalone binary works too)',
+        )
+        parser.add_argument('--skip-css', action='store_true', help='Keep the existing stylesheet bundle')
+
+    def handle(self, *args, **options):
+        static_dir = settings.STATICFILES_DIRS[0]
+
+        for path, url in assets.VENDOR_SCRIPTS.items():
+            target = static_dir / path
+            if target.exists() and not options['refetch']:
+                continue
+            if not (options['fetch'] or options['refetch']):
+                raise CommandError(f'{target} is missing; run with --fetch to download it from {url}')
+            self.stdout.write(f'Fetching {url}')
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    content = response.read()
+            except OSError as e:
+                raise CommandError(f'Could not download {url}: {e}')
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+
+        if not options['skip_css']:
+            self.build_styles(static_dir, options['tailwind'])
+
+        parts = []
+        for path in assets.SCRIPT_SOURCES:
+            source = (static_dir / path).read_text(encoding='utf-8')
+            if not path.endswith('.min.js'):
+                source = assets.minify_js(source)
+            # A bundled file may end mid-statement without a semicolon
+            parts.append(f'/* {path} */\n{source.strip()}\n;')
+        bundle = static_dir / assets.SCRIPT_BUNDLE
+        bundle.parent.mkdir(parents=True, exist_ok=True)
+        bundle.write_text('\n'.join(parts) + '\n', encoding='utf-8')
+        self.report(bundle, sum((static_dir / path).stat().st_size for path in assets.SCRIPT_SOURCES))
+
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            self.stdout.write(self.style.WARNING(
+                'Brotli is not installed; collectstatic will only write gzip copies (pip install Brotli)'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            'Bundles built; run collectstatic to hash and compress them, and set ASSET_BUNDLES=True'
+        ))
+
+    def build_styles(self, static_dir, tailwind):
+        """Compile only the Tailwind classes the templates and scripts use"""
+        output = static_dir / assets.STYLE_BUNDLE
+        output.parent.mkdir(parents=True, exist_ok=True)
+        command = shlex.split(tailwind) + [
+            '--output', str(output),
+            '--content', ','.join(assets.TAILWIND_CONTENT),
+            '--minify',
+        ]
+        self.stdout.write(f'Running {shlex.join(command)}')
+        try:
+            result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        except FileNotFoundError:
+            raise CommandError(f'Tailwind CLI not found: {tailwind!r}; pass --tailwind or --skip-css')
+        if result.returncode or not output.exists():
+            raise CommandError(f'Tailwind build failed:\n{result.stderr[-2000:]}')
+        self.report(output)
+
+    def report(self, path, source_bytes=None):
+        size = path.stat().st_size
+        line = f'  {path.relative_to(settings.BASE_DIR)}: {size / 1024:.1f} KiB'
+        if source_bytes:
+            line += f' (sources {source_bytes / 1024:.1f} KiB)'
+        self.stdout.write(line)
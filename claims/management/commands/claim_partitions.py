@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from claims import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage monthly discharge_date partitions of the claims table (PostgreSQL): '
+        'convert once, then create upcoming months (schedule monthly) and detach old ones. '
+        'Converting drops the foreign keys from details, flags, notes and activity to claims, so the '
+        'database no longer enforces them; detaching moves those rows to the archive schema '
+        '(or deletes them with --drop) together with their claims'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Rebuild claims_claim as a partitioned table (drops foreign keys to it)')
+        parser.add_argument('--ahead', type=int, default=3,
+                            help='Ensure partitions exist for this many months after the current one')
+        parser.add_argument('--detach-before', type=str,
+                            help='Detach monthly partitions up to and including YYYY-MM')
+        parser.add_argument('--archive-schema', type=str, default='claims_archive',
+                            help='Schema detached partitions and their dependent rows are moved to')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions and delete their dependent rows instead of archiving')
+        parser.add_argument('--list', action='store_true', help='List partitions with estimated row counts')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Claim partitioning needs PostgreSQL; this database is ' + connection.vendor)
+
+        try:
+            if options['convert']:
+                if partitions.is_partitioned():
+                    raise CommandError('claims_claim is already partitioned')
+                foreign_keys, created = partitions.convert(options['ahead'])
+                for table, constraint in foreign_keys:
+                    self.stdout.write(self.style.WARNING(f'Dropped foreign key {constraint} on {table}'))
+                self.stdout.write(self.style.SUCCESS(f'Partitioned claims_claim into {len(created)} monthly partitions'))
+            elif not partitions.is_partitioned():
+                raise CommandError('claims_claim is not partitioned; run with --convert first')
+
+            if options['detach_before']:
+                try:
+                    before = datetime.strptime(options['detach_before'], '%Y-%m').date()
+                except ValueError:
+                    raise CommandError(f"Invalid --detach-before: {options['detach_before']} (expected YYYY-MM)")
+                detached = partitions.detach_partitions(
+                    partitions.add_months(before, 1),
+                    archive_schema=options['archive_schema'],
+                    drop=options['drop'],
+                )
+                where = 'dropped' if options['drop'] else f"moved to schema {options['archive_schema']}"
+                for name, dependents in detached:
+                    counts = ', '.join(f'{count} from {table}' for table, count in dependents.items() if count)
+                    self.stdout.write(f'{name}: dependent rows {counts or "none"}')
+                self.stdout.write(self.style.SUCCESS(f'Detached {len(detached)} partitions ({where})'))
+
+            this_month = partitions.month_start(timezone.now().date())
+            created = partitions.create_partitions(this_month, partitions.add_months(this_month, options['ahead']))
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} upcoming partitions'))
+        except DatabaseError as e:
+            # e.g. rows for a new month already sitting in the default partition
+            raise CommandError(f'Partition change failed and was rolled back: {e}')
+
+        if options['list']:
+            for name, month, estimate in partitions.list_partitions():
+                self.stdout.write(f'{name}\t~{estimate} rows')
@@ -1,7 +1,9 @@
 from django.core.management.base import BaseCommand
 import json
 import csv
-from claims.models import Claim, ClaimDetail
+from django.db import transaction
+from claims import imports, ingest
+from claims.models import ClaimDetail
 
 
 class Command(BaseCommand):
@@ -10,27 +12,44 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--file', type=str, help='Path to the details file')
         parser.add_argument('--format', type=str, choices=['json', 'csv'], help='File format')
-        parser.add_argument('--clear', action='store_true', help='Clear existing details before loading')
+        parser.add_argument('--clear', action='store_true', help='Replace existing details: delete and reload in one transaction')
+        parser.add_argument('--rejects', type=str, help='Where to write rejected rows with reasons (default: <file>.rejected.csv in IMPORT_REJECTS_DIR)')
+        parser.add_argument('--chunk-size', type=int, help='Rows validated and loaded per chunk (default: IMPORT_CHUNK_SIZE)')
+        parser.add_argument('--preload-ids', action='store_true', help='Load every claim ID up front instead of looking IDs up per chunk')
 
     def handle(self, *args, **options):
         file_path = options['file']
         file_format = options['format']
         clear_existing = options['clear']
+        self.rejects_path = options.get('rejects') or imports.default_rejects_path(file_path)
+        self.chunk_size = options.get('chunk_size')
+        self.preload_ids = options.get('preload_ids', False)
+        self.loaded_count = 0
+        self.load_failed = False
 
         if not file_path:
             self.stdout.write(self.style.ERROR('Please provide a file path with --file'))
             return
 
-        if clear_existing:
-            ClaimDetail.objects.all().delete()
-            self.stdout.write(self.style.WARNING('Cleared existing claim details'))
-
-        if file_format == 'json':
-            self.load_from_json(file_path)
-        elif file_format == 'csv':
-            self.load_from_csv(file_path)
-        else:
+        if file_format not in ('json', 'csv'):
             self.stdout.write(self.style.ERROR('Please specify format with --format (json or csv)'))
+            return
+
+        # Clearing and reloading share one transaction, so the details are
+        # never seen empty and a failed load leaves the old ones in place
+        with transaction.atomic():
+            if clear_existing:
+                imports.delete_all(ClaimDetail)
+                self.stdout.write(self.style.WARNING('Cleared existing claim details'))
+
+            if file_format == 'json':
+                self.load_from_json(file_path)
+            else:
+                self.load_from_csv(file_path)
+
+            if clear_existing and (self.load_failed or not self.loaded_count):
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING('Nothing was loaded; existing claim details have been kept'))
 
     def load_from_json(self, file_path):
         """Load claim details from JSON file"""
@@ -39,74 +58,69 @@ class Command(BaseCommand):
                 data = json.load(f)
             
             if not isinstance(data, list):
+                self.load_failed = True
                 self.stdout.write(self.style.ERROR('JSON file must contain an array of claim details'))
                 return
 
             self.process_details_data(data)
             
         except FileNotFoundError:
+            self.load_failed = True
             self.stdout.write(self.style.ERROR(f'File not found: {file_path}'))
         except json.JSONDecodeError as e:
+            self.load_failed = True
             self.stdout.write(self.style.ERROR(f'Invalid JSON file: {e}'))
 
     def load_from_csv(self, file_path):
         """Load claim details from CSV file"""
         try:
-            details_data = []
-            with open(file_path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    details_data.append(row)
-            
-            self.process_details_data(details_data)
+            # Stream rows; they are validated and loaded a chunk at a time
+            with open(file_path, 'r', newline='') as f:
+                self.process_details_data(csv.DictReader(f))
             
         except FileNotFoundError:
+            self.load_failed = True
             self.stdout.write(self.style.ERROR(f'File not found: {file_path}'))
         except Exception as e:
+            self.load_failed = True
             self.stdout.write(self.style.ERROR(f'Error reading CSV file: {e}'))
 
     def process_details_data(self, details_data):
-        """Process and save claim details data to database"""
+        """Validate details a chunk at a time, merge the valid rows in bulk and report the rejects"""
         created_count = 0
         updated_count = 0
-        
-        for detail_data in details_data:
-            try:
-                # Get claim_id (could be 'claim_id' or 'id')
-                claim_id = detail_data.get('claim_id') or detail_data.get('id')
-                if not claim_id:
-                    self.stdout.write(self.style.WARNING('Skipping detail without claim_id'))
-                    continue
+        orphans = []
+        # Either one id__in lookup per chunk, or a single scan of claim IDs
+        known_ids = imports.load_claim_ids() if self.preload_ids else None
+        ingestor = ingest.get_ingestor()
+
+        with imports.RejectedRowsWriter(self.rejects_path) as rejects:
+            for chunk in imports.chunked(details_data, self.chunk_size):
+                valid_rows, rejected_rows = imports.validate_detail_chunk(chunk, known_ids)
+                rejects.write(rejected_rows)
+                orphans.extend(imports.orphan_ids(rejected_rows))
 
-                # Find the corresponding claim
                 try:
-                    claim = Claim.objects.get(id=claim_id)
-                except Claim.DoesNotExist:
-                    self.stdout.write(self.style.WARNING(f'Claim {claim_id} not found, skipping detail'))
+                    created, updated = ingestor.merge_details(valid_rows)
+                except Exception as e:
+                    # The chunk was rolled back as a whole; reject its rows together
+                    rejects.write([(row['line'], row, [f'database error: {e}']) for row in valid_rows])
                     continue
+                created_count += created
+                updated_count += updated
 
-                # Create or update claim detail
-                detail, created = ClaimDetail.objects.get_or_create(
-                    claim=claim,
-                    defaults={
-                        'cpt_codes': detail_data.get('cpt_codes', ''),
-                        'denial_reason': detail_data.get('denial_reason', '') or None,
-                    }
-                )
-                
-                if not created:
-                    # Update existing detail
-                    detail.cpt_codes = detail_data.get('cpt_codes', detail.cpt_codes)
-                    detail.denial_reason = detail_data.get('denial_reason', '') or None
-                    detail.save()
-                    updated_count += 1
-                else:
-                    created_count += 1
-
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f'Error processing detail for claim {claim_id}: {e}'))
-                continue
+        self.loaded_count += created_count + updated_count
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully processed {len(details_data)} claim details: {created_count} created, {updated_count} updated')
+            self.style.SUCCESS(f'Successfully processed claim details: {created_count} created, {updated_count} updated')
         )
+        if orphans:
+            unknown = list(dict.fromkeys(orphans))
+            sample = ', '.join(unknown[:10])
+            more = f' and {len(unknown) - 10} more' if len(unknown) > 10 else ''
+            self.stdout.write(self.style.WARNING(
+                f'{len(orphans)} rows reference {len(unknown)} unknown claims: {sample}{more}'
+            ))
+        if rejects.count:
+            self.stdout.write(self.style.WARNING(f'Rejected {rejects.count} rows; see {rejects.path}'))
+        self.rejected_count = rejects.count
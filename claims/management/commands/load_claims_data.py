@@ -1,8 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from claims.models import Claim, ClaimDetail
-from decimal import Decimal
-from datetime import datetime
+from django.db import transaction
+from claims import activity, imports, ingest
+from claims.models import Claim
 import json
 import csv
 import os
@@ -21,7 +21,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Clear existing data before loading new data',
+            help='Replace existing data: delete and reload in one transaction',
         )
         parser.add_argument(
             '--format',
@@ -29,13 +29,42 @@ class Command(BaseCommand):
             choices=['json', 'csv'],
             help='File format (json or csv)',
         )
+        parser.add_argument(
+            '--rejects',
+            type=str,
+            help='Where to write rejected rows with reasons (default: <file>.rejected.csv in IMPORT_REJECTS_DIR)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows validated and loaded per chunk (default: IMPORT_CHUNK_SIZE)',
+        )
 
     def handle(self, *args, **options):
-        if options['clear']:
+        self.rejects_path = options.get('rejects') or imports.default_rejects_path(options.get('file'))
+        self.chunk_size = options.get('chunk_size')
+        self.loaded_count = 0
+        self.load_failed = False
+
+        if not options['clear']:
+            self.load(options)
+            return
+
+        # Delete and reload in one transaction, so readers see the old
+        # claims until the new ones commit and never an empty table
+        with transaction.atomic():
             self.stdout.write('Clearing existing data...')
-            Claim.objects.all().delete()
+            imports.delete_all(Claim)
             User.objects.filter(username='demo_user').delete()
+            self.load(options)
+            if self.load_failed or not self.loaded_count:
+                transaction.set_rollback(True)
+                self.stdout.write(
+                    self.style.WARNING('Nothing was loaded; existing data has been kept')
+                )
 
+    def load(self, options):
+        """Load the file named in options, or the default data files"""
         # Create demo user
         user, created = User.objects.get_or_create(
             username='demo_user',
@@ -81,6 +110,7 @@ class Command(BaseCommand):
                 elif file_path.endswith('.csv'):
                     file_format = 'csv'
                 else:
+                    self.load_failed = True
                     self.stdout.write(
                         self.style.ERROR('Cannot determine file format. Please specify --format')
                     )
@@ -104,6 +134,7 @@ class Command(BaseCommand):
             elif isinstance(data, dict) and 'claims' in data:
                 claims_data = data['claims']
             else:
+                self.load_failed = True
                 self.stdout.write(
                     self.style.ERROR('Invalid JSON format. Expected array of claims or object with "claims" key.')
                 )
@@ -112,10 +143,12 @@ class Command(BaseCommand):
             self.process_claims_data(claims_data, user)
             
         except FileNotFoundError:
+            self.load_failed = True
             self.stdout.write(
                 self.style.ERROR(f'File not found: {file_path}')
             )
         except json.JSONDecodeError as e:
+            self.load_failed = True
             self.stdout.write(
                 self.style.ERROR(f'Invalid JSON file: {e}')
             )
@@ -123,112 +156,61 @@ class Command(BaseCommand):
     def load_from_csv(self, file_path, user):
         """Load claims data from CSV file"""
         try:
-            claims_data = []
-            with open(file_path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    claims_data.append(row)
-            
-            self.process_claims_data(claims_data, user)
+            # Stream rows; they are validated and loaded a chunk at a time
+            with open(file_path, 'r', newline='') as f:
+                self.process_claims_data(csv.DictReader(f), user)
             
         except FileNotFoundError:
+            self.load_failed = True
             self.stdout.write(
                 self.style.ERROR(f'File not found: {file_path}')
             )
         except Exception as e:
+            self.load_failed = True
             self.stdout.write(
                 self.style.ERROR(f'Error reading CSV file: {e}')
             )
 
     def process_claims_data(self, claims_data, user):
-        """Process and save claims data to database"""
+        """Validate claims a chunk at a time, merge the valid rows in bulk and report the rejects"""
         created_count = 0
         updated_count = 0
-        
-        for claim_data in claims_data:
-            try:
-                # Parse and validate data
-                claim_id = str(claim_data.get('id', claim_data.get('claim_id', '')))
-                if not claim_id:
-                    self.stdout.write(
-                        self.style.WARNING('Skipping claim without ID')
-                    )
-                    continue
+        ingestor = ingest.get_ingestor()
 
-                # Create or update claim
-                claim, created = Claim.objects.get_or_create(
-                    id=claim_id,
-                    defaults={
-                        'patient_name': claim_data.get('patient_name', ''),
-                        'billed_amount': self.parse_decimal(claim_data.get('billed_amount', 0)),
-                        'paid_amount': self.parse_decimal(claim_data.get('paid_amount', 0)),
-                        'status': claim_data.get('status', 'Pending'),
-                        'insurer_name': claim_data.get('insurer_name', ''),
-                        'discharge_date': self.parse_date(claim_data.get('discharge_date', '')),
-                    }
-                )
-                
-                if not created:
-                    # Update existing claim
-                    claim.patient_name = claim_data.get('patient_name', claim.patient_name)
-                    claim.billed_amount = self.parse_decimal(claim_data.get('billed_amount', claim.billed_amount))
-                    claim.paid_amount = self.parse_decimal(claim_data.get('paid_amount', claim.paid_amount))
-                    claim.status = claim_data.get('status', claim.status)
-                    claim.insurer_name = claim_data.get('insurer_name', claim.insurer_name)
-                    claim.discharge_date = self.parse_date(claim_data.get('discharge_date', claim.discharge_date))
-                    claim.save()
-                    updated_count += 1
-                else:
-                    created_count += 1
+        with imports.RejectedRowsWriter(self.rejects_path) as rejects:
+            for chunk in imports.chunked(claims_data, self.chunk_size):
+                valid_rows, rejected_rows = imports.validate_claim_chunk(chunk)
+                rejects.write(rejected_rows)
 
-                # Create or update claim detail
-                ClaimDetail.objects.get_or_create(
-                    claim=claim,
-                    defaults={
-                        'cpt_codes': claim_data.get('cpt_codes', ''),
-                        'denial_reason': claim_data.get('denial_reason', '') or None,
-                    }
-                )
+                try:
+                    created_ids, updated_ids = ingestor.merge_claims(valid_rows)
+                except Exception as e:
+                    # The chunk was rolled back as a whole; reject its rows together
+                    rejects.write([(row['line'], row, [f'database error: {e}']) for row in valid_rows])
+                    continue
+                created_count += len(created_ids)
+                updated_count += len(updated_ids)
 
-            except Exception as e:
-                self.stdout.write(
-                    self.style.WARNING(f'Error processing claim {claim_data.get("id", "unknown")}: {e}')
+                events = [
+                    activity.build_event(claim_id, 'claim_imported', user, 'Created by import')
+                    for claim_id in created_ids
+                ]
+                events.extend(
+                    activity.build_event(claim_id, 'claim_imported', user, 'Updated by import')
+                    for claim_id in updated_ids
                 )
-                continue
+                activity.record_events(events)
+
+        self.loaded_count += created_count + updated_count
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully processed {len(claims_data)} claims: {created_count} created, {updated_count} updated')
+            self.style.SUCCESS(f'Successfully processed claims: {created_count} created, {updated_count} updated')
         )
-
-    def parse_decimal(self, value):
-        """Parse decimal value from string"""
-        if isinstance(value, (int, float)):
-            return Decimal(str(value))
-        if isinstance(value, str):
-            # Remove currency symbols and commas
-            cleaned = value.replace('$', '').replace(',', '').strip()
-            try:
-                return Decimal(cleaned)
-            except:
-                return Decimal('0.00')
-        return Decimal('0.00')
-
-    def parse_date(self, value):
-        """Parse date from string"""
-        if isinstance(value, str):
-            # Try different date formats
-            date_formats = [
-                '%Y-%m-%d',
-                '%m/%d/%Y',
-                '%d/%m/%Y',
-                '%Y-%m-%d %H:%M:%S',
-            ]
-            for fmt in date_formats:
-                try:
-                    return datetime.strptime(value, fmt).date()
-                except ValueError:
-                    continue
-        return datetime.now().date()
+        if rejects.count:
+            self.stdout.write(
+                self.style.WARNING(f'Rejected {rejects.count} rows; see {rejects.path}')
+            )
+        self.rejected_count = rejects.count
 
     def create_sample_data(self, user):
         """Create sample data if no files are provided"""
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# What a cold serverless worker does before its first response: load the
+# WSGI app, then resolve URLs, which imports the URLconf and every view module
+STARTUP_SCRIPT = '''
+import sys, time
+started = time.perf_counter()
+from erisa_recovery.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - started, len(sys.modules))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold-start import time and module count of the WSGI app in fresh interpreters '
+        '(python -X importtime); fails when over --max-ms / --max-modules'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters to start; the fastest is reported')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list by import time')
+        parser.add_argument('--max-ms', type=float, help='Fail if startup takes longer than this')
+        parser.add_argument('--max-modules', type=int, help='Fail if more modules than this are imported')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'erisa_recovery.settings'))
+        runs = [self.run_once(env) for _ in range(max(1, options['repeat']))]
+        elapsed, module_count, packages = min(runs, key=lambda run: run[0])
+
+        self.stdout.write(f'Startup (settings {env["DJANGO_SETTINGS_MODULE"]}): {elapsed * 1000:.0f}ms, {module_count} modules')
+        self.stdout.write('Import time by top-level package (self time, fastest run):')
+        for package, micros in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {micros / 1000:8.1f}ms  {package}')
+
+        failures = []
+        if options['max_ms'] is not None and elapsed * 1000 > options['max_ms']:
+            failures.append(f'startup {elapsed * 1000:.0f}ms exceeds {options["max_ms"]:.0f}ms')
+        if options['max_modules'] is not None and module_count > options['max_modules']:
+            failures.append(f'{module_count} modules exceeds {options["max_modules"]}')
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Within budget'))
+
+    def run_once(self, env):
+        """(seconds, module count, {package: self microseconds}) for one fresh interpreter"""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Startup failed:\n{result.stderr[-2000:]}')
+
+        packages = defaultdict(int)
+        for line in result.stderr.splitlines():
+            # import time:       self [us] |  cumulative | imported package
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            packages[name.strip().split('.')[0]] += int(self_us)
+
+        elapsed, module_count = result.stdout.split()[-2:]
+        return float(elapsed), int(module_count), packages
@@ -26,8 +26,8 @@ class Command(BaseCommand):
                 is_superuser=True
             )
             
-            # Create admin profile
-            UserProfile.objects.create(user=admin_user, role='admin')
+            # Promote the profile created by the post_save signal
+            UserProfile.objects.update_or_create(user=admin_user, defaults={'role': 'admin'})
             
             self.stdout.write(self.style.SUCCESS(f'Created admin user: {admin_username} / {admin_password}'))
         else:
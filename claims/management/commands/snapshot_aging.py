@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from claims.aging import bucket_labels, take_snapshot, validate_bucket_edges
+from claims.models import Claim
+
+
+class Command(BaseCommand):
+    help = 'Snapshot claim aging buckets per status and insurer (schedule nightly, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=str, help='Snapshot date as YYYY-MM-DD (defaults to today)')
+        parser.add_argument('--status', action='append', dest='statuses',
+                            help='Status to snapshot; repeat for several (defaults to CLAIMS_AGING_SNAPSHOT_STATUSES)')
+        parser.add_argument('--edges', type=str, help='Comma-separated bucket edges in days, e.g. 30,60,90')
+
+    def handle(self, *args, **options):
+        snapshot_date = None
+        if options['date']:
+            try:
+                snapshot_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Invalid --date: {options['date']} (expected YYYY-MM-DD)")
+
+        edges = None
+        if options['edges']:
+            try:
+                edges = validate_bucket_edges(options['edges'].split(','))
+            except ValueError as e:
+                raise CommandError(f"Invalid --edges: {options['edges']} ({e})")
+
+        snapshots = take_snapshot(
+            Claim.objects.all(),
+            statuses=options['statuses'],
+            edges=edges,
+            snapshot_date=snapshot_date,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(snapshots)} aging snapshot rows "
+            f"(buckets: {', '.join(bucket_labels(edges))})"
+        ))
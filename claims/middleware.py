@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .models import UserProfile
+from .routers import pin_to_primary, replica_configured
+
+
+ROLE_SESSION_KEY = '_claims_user_role'
+
+
+def get_user_role(request):
+    """Role of the logged-in user ('admin'/'user'), or None
+
+    Resolved with one query per USER_ROLE_CACHE_TTL and kept in the session,
+    so role checks on ordinary requests cost nothing. Role changes therefore
+    take effect within that TTL (or at the next login).
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    now = int(time.time())
+    cached = request.session.get(ROLE_SESSION_KEY)
+    if cached and cached[0] == user.pk and now - cached[2] < settings.USER_ROLE_CACHE_TTL:
+        return cached[1]
+
+    role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+    request.session[ROLE_SESSION_KEY] = [user.pk, role, now]
+    return role
+
+
+class UserRoleMiddleware:
+    """Expose the session-cached role as request.user_role (resolved lazily)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_role = SimpleLazyObject(lambda: get_user_role(request))
+        return self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """Pin a user's reads to the primary for a while after any successful write request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            replica_configured()
+            and request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request)
+        return response
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:55
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_underpayment(apps, schema_editor):
+    Claim = apps.get_model("claims", "Claim")
+    Claim.objects.filter(billed_amount__gt=F("paid_amount")).update(
+        underpayment=F("billed_amount") - F("paid_amount")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0002_alter_claim_status_alter_flag_reason_userprofile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="claim",
+            name="underpayment",
+            field=models.DecimalField(
+                db_index=True,
+                decimal_places=2,
+                default=0,
+                editable=False,
+                max_digits=12,
+            ),
+        ),
+        migrations.RunPython(backfill_underpayment, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="claim",
+            index=models.Index(
+                fields=["status", "-underpayment"], name="claim_status_underpay_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0003_claim_underpayment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgingSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("snapshot_date", models.DateField()),
+                ("status", models.CharField(max_length=50)),
+                ("insurer_name", models.CharField(max_length=255)),
+                ("bucket", models.CharField(max_length=20)),
+                ("claim_count", models.PositiveIntegerField(default=0)),
+                (
+                    "underpayment_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-snapshot_date", "status", "insurer_name", "bucket"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="agingsnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("snapshot_date", "status", "insurer_name", "bucket"),
+                name="aging_snapshot_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def backfill_user_profiles(apps, schema_editor):
+    # Profiles used to be created lazily on the claims list; they are now
+    # created by a post_save signal, so give existing users one up front
+    User = apps.get_model("auth", "User")
+    UserProfile = apps.get_model("claims", "UserProfile")
+    UserProfile.objects.bulk_create(
+        [
+            UserProfile(user_id=user_id, role="user")
+            for user_id in User.objects.filter(userprofile__isnull=True).values_list(
+                "id", flat=True
+            )
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("claims", "0004_agingsnapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Expression index backing EmailOrUsernameBackend's LOWER(email) lookup;
+    # auth_user.email is otherwise unindexed
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("claims", "0005_backfill_user_profiles"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX claims_user_email_lower_idx ON auth_user (LOWER(email));",
+            "DROP INDEX IF EXISTS claims_user_email_lower_idx;",
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:02
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def resolve_duplicate_active_flags(apps, schema_editor):
+    # Keep the newest unresolved flag per claim; resolve older duplicates so
+    # the constraint can be added
+    Flag = apps.get_model("claims", "Flag")
+    seen = set()
+    duplicates = []
+    for flag_id, claim_id in (
+        Flag.objects.filter(is_resolved=False)
+        .order_by("claim_id", "-created_at", "-id")
+        .values_list("id", "claim_id")
+    ):
+        if claim_id in seen:
+            duplicates.append(flag_id)
+        seen.add(claim_id)
+    Flag.objects.filter(id__in=duplicates).update(
+        is_resolved=True, resolved_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0006_user_email_lower_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_active_flags, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="flag",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_resolved", False)),
+                fields=("claim",),
+                name="one_active_flag_per_claim",
+            ),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_activity(apps, schema_editor):
+    # Seed the stream from existing flags and notes, keeping their timestamps
+    ActivityEvent = apps.get_model("claims", "ActivityEvent")
+    Flag = apps.get_model("claims", "Flag")
+    Note = apps.get_model("claims", "Note")
+
+    def summary(text):
+        return text[:252] + "..." if len(text) > 255 else text
+
+    events = []
+    for flag in Flag.objects.all().iterator():
+        events.append(
+            ActivityEvent(
+                claim_id=flag.claim_id,
+                user_id=flag.user_id,
+                event_type="flag_created",
+                summary=summary(flag.reason),
+                object_id=flag.pk,
+                created_at=flag.created_at,
+            )
+        )
+        if flag.is_resolved and flag.resolved_at:
+            events.append(
+                ActivityEvent(
+                    claim_id=flag.claim_id,
+                    user_id=flag.user_id,
+                    event_type="flag_resolved",
+                    summary="Flag resolved",
+                    object_id=flag.pk,
+                    created_at=flag.resolved_at,
+                )
+            )
+    for note in Note.objects.all().iterator():
+        events.append(
+            ActivityEvent(
+                claim_id=note.claim_id,
+                user_id=note.user_id,
+                event_type="note_added",
+                summary=summary(note.content),
+                object_id=note.pk,
+                created_at=note.created_at,
+            )
+        )
+    ActivityEvent.objects.bulk_create(events, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("claims", "0007_one_active_flag_per_claim"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.CharField(
+                        choices=[
+                            ("flag_created", "Flag Created"),
+                            ("flag_resolved", "Flag Resolved"),
+                            ("note_added", "Note Added"),
+                            ("claim_imported", "Claim Imported"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("summary", models.CharField(blank=True, max_length=255)),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(
+                        blank=True, help_text="Flag or note ID, if any", null=True
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "claim",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        to="claims.claim",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["claim", "-created_at", "-id"],
+                        name="activity_claim_created_idx",
+                    ),
+                    models.Index(
+                        fields=["-created_at", "-id"], name="activity_created_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
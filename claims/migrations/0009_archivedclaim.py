@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0008_activityevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedClaim",
+            fields=[
+                (
+                    "claim_id",
+                    models.CharField(max_length=20, primary_key=True, serialize=False),
+                ),
+                ("patient_name", models.CharField(max_length=255)),
+                ("status", models.CharField(max_length=50)),
+                ("insurer_name", models.CharField(max_length=255)),
+                ("discharge_date", models.DateField(db_index=True)),
+                ("payload", models.BinaryField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "ordering": ["-discharge_date"],
+            },
+        ),
+    ]
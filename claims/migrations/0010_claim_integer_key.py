@@ -0,0 +1,195 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:12
+#
+# Replaces the CharField claim primary key with a BigAutoField. The external
+# claim number moves to Claim.claim_number (unique), and the foreign keys on
+# details, flags, notes and activity are rebuilt as integer columns:
+#
+# 1. add claim_number and an integer key to claims, and an integer claim_key
+#    to every related table, then fill them in (keys follow created_at)
+# 2. drop the old string foreign keys, move the primary key to the integer
+#    column and drop the old string id
+# 3. rename the integer columns into place as id / claim_id and restore the
+#    foreign keys, constraint and indexes
+# 4. rename ArchivedClaim.claim_id to claim_number to match Claim
+#
+# Run it before `claim_partitions --convert`, or on an unpartitioned table.
+
+from django.core.management.color import no_style
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+RELATED_MODELS = ("ClaimDetail", "Flag", "Note", "ActivityEvent")
+BATCH_SIZE = 1000
+
+
+def assign_keys(apps, schema_editor):
+    Claim = apps.get_model("claims", "Claim")
+    Claim.objects.update(claim_number=models.F("id"))
+
+    claim_ids = Claim.objects.order_by("created_at", "id").values_list("id", flat=True)
+    batch = []
+    for key, claim_id in enumerate(claim_ids.iterator(chunk_size=BATCH_SIZE), start=1):
+        batch.append(Claim(id=claim_id, key=key))
+        if len(batch) == BATCH_SIZE:
+            Claim.objects.bulk_update(batch, ["key"])
+            batch = []
+    Claim.objects.bulk_update(batch, ["key"])
+
+    for model_name in RELATED_MODELS:
+        apps.get_model("claims", model_name).objects.update(
+            claim_key=Subquery(
+                Claim.objects.filter(id=OuterRef("claim_id")).values("key")[:1]
+            )
+        )
+
+
+def drop_claim_primary_key(apps, schema_editor):
+    # SQLite rebuilds the table when the key moves, demoting the old one
+    if schema_editor.connection.vendor != "sqlite":
+        schema_editor._delete_primary_key(apps.get_model("claims", "Claim"))
+
+
+def reset_claim_sequence(apps, schema_editor):
+    # The new identity/sequence must start after the keys assigned above
+    connection = schema_editor.connection
+    for sql in connection.ops.sequence_reset_sql(
+        no_style(), [apps.get_model("claims", "Claim")]
+    ):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0009_archivedclaim"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="claim",
+            name="claim_number",
+            field=models.CharField(help_text="Claim ID", max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="claim",
+            name="key",
+            field=models.BigIntegerField(null=True),
+        ),
+        *[
+            migrations.AddField(
+                model_name=model_name.lower(),
+                name="claim_key",
+                field=models.BigIntegerField(null=True),
+            )
+            for model_name in RELATED_MODELS
+        ],
+        migrations.RunPython(assign_keys),
+        migrations.RemoveConstraint(
+            model_name="flag",
+            name="one_active_flag_per_claim",
+        ),
+        migrations.RemoveIndex(
+            model_name="activityevent",
+            name="activity_claim_created_idx",
+        ),
+        *[
+            migrations.RemoveField(
+                model_name=model_name.lower(),
+                name="claim",
+            )
+            for model_name in RELATED_MODELS
+        ],
+        migrations.RunPython(drop_claim_primary_key),
+        migrations.AlterField(
+            model_name="claim",
+            name="key",
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+        migrations.RemoveField(
+            model_name="claim",
+            name="id",
+        ),
+        migrations.RenameField(
+            model_name="claim",
+            old_name="key",
+            new_name="id",
+        ),
+        migrations.AlterField(
+            model_name="claim",
+            name="id",
+            field=models.BigAutoField(
+                auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+            ),
+        ),
+        migrations.RunPython(reset_claim_sequence),
+        migrations.AlterField(
+            model_name="claim",
+            name="claim_number",
+            field=models.CharField(help_text="Claim ID", max_length=20, unique=True),
+        ),
+        *[
+            migrations.RenameField(
+                model_name=model_name.lower(),
+                old_name="claim_key",
+                new_name="claim",
+            )
+            for model_name in RELATED_MODELS
+        ],
+        migrations.AlterField(
+            model_name="claimdetail",
+            name="claim",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="details",
+                to="claims.claim",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="flag",
+            name="claim",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="flags",
+                to="claims.claim",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="note",
+            name="claim",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notes",
+                to="claims.claim",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="activityevent",
+            name="claim",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="activity",
+                to="claims.claim",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="flag",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_resolved", False)),
+                fields=("claim",),
+                name="one_active_flag_per_claim",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activityevent",
+            index=models.Index(
+                fields=["claim", "-created_at", "-id"],
+                name="activity_claim_created_idx",
+            ),
+        ),
+        migrations.RenameField(
+            model_name="archivedclaim",
+            old_name="claim_id",
+            new_name="claim_number",
+        ),
+    ]
@@ -4,8 +4,12 @@ from django.utils import timezone
 
 
 class Claim(models.Model):
-    """Main claim record - provided data"""
-    id = models.CharField(max_length=20, primary_key=True, help_text="Claim ID")
+    """Main claim record - provided data
+
+    Keyed by a compact integer; the external claim number is a unique
+    column, so related tables join on 8-byte integers instead of strings.
+    """
+    claim_number = models.CharField(max_length=20, unique=True, help_text="Claim ID")
     patient_name = models.CharField(max_length=255)
     billed_amount = models.DecimalField(max_digits=12, decimal_places=2)
     paid_amount = models.DecimalField(max_digits=12, decimal_places=2)
@@ -17,14 +21,27 @@ class Claim(models.Model):
     ])
     insurer_name = models.CharField(max_length=255)
     discharge_date = models.DateField()
+    # Materialized max(0, billed - paid), kept in sync by save(); indexed so
+    # recovery worklists are an index scan instead of a sort
+    underpayment = models.DecimalField(max_digits=12, decimal_places=2, default=0, db_index=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-discharge_date']
+        indexes = [
+            models.Index(fields=['status', '-underpayment'], name='claim_status_underpay_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.id} - {self.patient_name}"
+        return f"{self.claim_number} - {self.patient_name}"
+
+    def save(self, *args, **kwargs):
+        self.underpayment = self.underpayment_amount
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'underpayment' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['underpayment']
+        super().save(*args, **kwargs)
 
     @property
     def underpayment_amount(self):
@@ -52,7 +69,7 @@ class ClaimDetail(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Detail for {self.claim.id}"
+        return f"Detail for {self.claim.claim_number}"
 
     @property
     def cpt_codes_list(self):
@@ -95,9 +112,17 @@ class Flag(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            # At most one unresolved flag per claim, enforced by the database
+            models.UniqueConstraint(
+                fields=['claim'],
+                condition=models.Q(is_resolved=False),
+                name='one_active_flag_per_claim',
+            ),
+        ]
 
     def __str__(self):
-        return f"Flag for {self.claim.id} by {self.user.username}"
+        return f"Flag for {self.claim.claim_number} by {self.user.username}"
 
     def resolve(self):
         """Resolve the flag"""
@@ -123,21 +148,99 @@ class Note(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Note for {self.claim.id} by {self.user.username}"
+        return f"Note for {self.claim.claim_number} by {self.user.username}"
 
     @property
     def time_ago(self):
-        """Human readable time since creation"""
-        now = timezone.now()
-        diff = now - self.created_at
+        """Human readable time since creation (templates use the relative_time filter instead)"""
+        # total_seconds(): timedelta.seconds drops whole days and wraps for
+        # timestamps slightly in the future
+        seconds = int((timezone.now() - self.created_at).total_seconds())
         
-        if diff.days > 0:
-            return f"{diff.days} day{'s' if diff.days > 1 else ''} ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
+        if seconds >= 86400:
+            days = seconds // 86400
+            return f"{days} day{'s' if days > 1 else ''} ago"
+        elif seconds >= 3600:
+            hours = seconds // 3600
             return f"{hours} hour{'s' if hours > 1 else ''} ago"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
+        elif seconds >= 60:
+            minutes = seconds // 60
             return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
         else:
             return "Just now"
+
+
+class AgingSnapshot(models.Model):
+    """Nightly aging bucket counts per status and insurer, for trend charts"""
+    snapshot_date = models.DateField()
+    status = models.CharField(max_length=50)
+    insurer_name = models.CharField(max_length=255)
+    bucket = models.CharField(max_length=20)
+    claim_count = models.PositiveIntegerField(default=0)
+    underpayment_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-snapshot_date', 'status', 'insurer_name', 'bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['snapshot_date', 'status', 'insurer_name', 'bucket'],
+                name='aging_snapshot_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot_date} {self.status} {self.insurer_name} {self.bucket}: {self.claim_count}"
+
+
+class ActivityEvent(models.Model):
+    """Append-only claim activity stream (flags, notes, imports)"""
+    EVENT_TYPES = [
+        ('flag_created', 'Flag Created'),
+        ('flag_resolved', 'Flag Resolved'),
+        ('note_added', 'Note Added'),
+        ('claim_imported', 'Claim Imported'),
+    ]
+
+    claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='activity')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPES)
+    summary = models.CharField(max_length=255, blank=True)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True, help_text="Flag or note ID, if any")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['claim', '-created_at', '-id'], name='activity_claim_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='activity_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} on {self.claim_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Activity events are append-only')
+        super().save(*args, **kwargs)
+
+
+class ArchivedClaim(models.Model):
+    """Cold claim moved out of the hot tables (see claims.archive)
+
+    The searchable columns are kept as-is; the full record, with its details,
+    flags, notes and activity, is stored as zlib-compressed JSON.
+    """
+    claim_number = models.CharField(max_length=20, primary_key=True)
+    patient_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=50)
+    insurer_name = models.CharField(max_length=255)
+    discharge_date = models.DateField(db_index=True)
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-discharge_date']
+
+    def __str__(self):
+        return f"{self.claim_number} - {self.patient_name} (archived)"
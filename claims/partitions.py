@@ -0,0 +1,251 @@
+"""Optional PostgreSQL range partitioning of claims by discharge month.
+
+``claim_partitions --convert`` turns ``claims_claim`` into a table
+partitioned by ``discharge_date``. Each month is a ``claims_claim_yYYYYmMM``
+partition, plus a default partition for anything outside them. Date-bounded
+dashboard and aging queries then only scan the months they touch, and whole
+old months can be detached or archived without rewriting the table.
+
+PostgreSQL requires the partition key in every unique constraint, so
+converting gives up two guarantees the plain table had:
+
+* The primary key becomes (id, discharge_date), and claim_number is only
+  unique together with discharge_date. Global claim number uniqueness is
+  kept by a trigger that mirrors every claim number into the
+  ``claims_claim_number`` table, whose primary key rejects duplicates.
+* Foreign keys pointing at claims (details, flags, notes, activity) are
+  dropped, because they could only reference that composite key. The
+  database no longer cascades or checks claim references: ``add_flag``
+  looks the claim up first once claims are partitioned, and
+  ``detach_partitions`` moves or deletes the dependent rows itself.
+
+The application keeps using ``id`` alone. Restart the app servers after
+converting so they pick up the change (see ``claims_partitioned``).
+"""
+import re
+from datetime import date
+from functools import lru_cache
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+from .models import Claim
+
+
+TABLE = Claim._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+NUMBER_TABLE = f'{TABLE}_number'
+NUMBER_TRIGGER = f'{NUMBER_TABLE}_sync'
+PARTITION_NAME = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def is_partitioned(using=DEFAULT_DB_ALIAS):
+    """True if claims_claim is a partitioned table (always False off PostgreSQL)"""
+    if connections[using].vendor != 'postgresql':
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [TABLE])
+        return cursor.fetchone() is not None
+
+
+# Checked once per process; convert() clears it for the process that converts
+claims_partitioned = lru_cache(maxsize=None)(is_partitioned)
+
+
+def list_partitions():
+    """[(name, first day of month or None for the default partition, row estimate)]"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, c.reltuples::bigint FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, estimate in rows:
+        match = PARTITION_NAME.match(name)
+        month = date(int(match[1]), int(match[2]), 1) if match else None
+        partitions.append((name, month, max(estimate, 0)))
+    return partitions
+
+
+def create_partition(cursor, month):
+    """Create the partition for one month if it does not exist yet"""
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{TABLE}" '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [month, add_months(month, 1)],
+    )
+
+
+def create_partitions(first_month, last_month):
+    """Ensure a partition exists for every month from first_month to last_month inclusive"""
+    created = []
+    existing = {name for name, month, estimate in list_partitions()}
+    with transaction.atomic(), connection.cursor() as cursor:
+        month = month_start(first_month)
+        while month <= last_month:
+            if partition_name(month) not in existing:
+                create_partition(cursor, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+    return created
+
+
+def dependent_tables():
+    """[(table, claim key column)] for the tables whose rows belong to a claim"""
+    return [
+        (related.related_model._meta.db_table, related.field.column)
+        for related in Claim._meta.related_objects
+    ]
+
+
+def detach_partitions(before, archive_schema='claims_archive', drop=False):
+    """Detach monthly partitions that end on or before `before` (a month start)
+
+    Detached tables are moved to archive_schema (kept queryable there), or
+    dropped when drop is set. Nothing enforces the foreign keys to a
+    partitioned claims table, so the details, flags, notes and activity of
+    the detached claims are handled in the same transaction: copied into
+    tables of the same name in archive_schema and deleted, or just deleted
+    when dropping. Returns [(partition, {table: dependent rows moved or deleted})].
+    """
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not drop:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+        for name, month, estimate in list_partitions():
+            if month is None or add_months(month, 1) > before:
+                continue
+            dependents = {}
+            # Detached claims no longer hold their claim numbers
+            cursor.execute(
+                f'DELETE FROM "{NUMBER_TABLE}" WHERE "claim_number" IN (SELECT "claim_number" FROM "{name}")'
+            )
+            for table, column in dependent_tables():
+                claim_keys = f'SELECT "id" FROM "{name}"'
+                if not drop:
+                    cursor.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{archive_schema}"."{table}" '
+                        f'(LIKE "{table}" INCLUDING DEFAULTS)'
+                    )
+                    cursor.execute(
+                        f'INSERT INTO "{archive_schema}"."{table}" '
+                        f'SELECT * FROM "{table}" WHERE "{column}" IN ({claim_keys})'
+                    )
+                cursor.execute(f'DELETE FROM "{table}" WHERE "{column}" IN ({claim_keys})')
+                dependents[table] = cursor.rowcount
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            if drop:
+                cursor.execute(f'DROP TABLE "{name}"')
+            else:
+                cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+            detached.append((name, dependents))
+    return detached
+
+
+def convert(ahead=3):
+    """Rebuild claims_claim as a partitioned table in one transaction
+
+    Returns (dropped foreign keys, created partitions).
+    """
+    old_table = f'{TABLE}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old_table}"')
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE confrelid = %s::regclass AND contype = 'f'",
+            [old_table],
+        )
+        foreign_keys = cursor.fetchall()
+        for table, constraint in foreign_keys:
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{constraint}"')
+
+        # Secondary indexes are recreated on the partitioned table (and so on every partition)
+        cursor.execute(
+            'SELECT i.indexname, i.indexdef, x.indisunique FROM pg_indexes i '
+            'JOIN pg_class c ON c.relname = i.indexname '
+            'JOIN pg_index x ON x.indexrelid = c.oid '
+            'WHERE i.tablename = %s AND NOT x.indisprimary',
+            [old_table],
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{old_table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE ("discharge_date")'
+        )
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'SELECT MIN("discharge_date"), MAX("discharge_date") FROM "{old_table}"')
+        first, last = cursor.fetchone()
+        this_month = month_start(date.today())
+        first = month_start(first) if first else this_month
+        last = max(month_start(last) if last else this_month, add_months(this_month, ahead))
+        created = []
+        month = first
+        while month <= last:
+            create_partition(cursor, month)
+            created.append(partition_name(month))
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old_table}"')
+        # The copied identity starts over; continue after the existing keys
+        cursor.execute(
+            f'SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX("id"), 1), MAX("id") IS NOT NULL) '
+            f'FROM "{TABLE}"',
+            [TABLE, 'id'],
+        )
+        # Dropping the old table frees its index and primary key names for reuse
+        cursor.execute(f'DROP TABLE "{old_table}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY ("id", "discharge_date")')
+        for name, definition, unique in indexes:
+            definition = definition.replace(old_table, TABLE)
+            if unique:
+                # e.g. claim_number: unique per partition key only
+                definition = re.sub(r'\)$', ', discharge_date)', definition)
+            cursor.execute(definition)
+        create_number_index(cursor)
+    claims_partitioned.cache_clear()
+    return foreign_keys, created
+
+
+def create_number_index(cursor):
+    """Keep claim numbers unique across partitions through a trigger-maintained table
+
+    Moving a claim to another month's partition runs as a delete and an
+    insert, which release and re-take its number.
+    """
+    cursor.execute(f'CREATE TABLE "{NUMBER_TABLE}" AS SELECT "claim_number" FROM "{TABLE}"')
+    cursor.execute(f'ALTER TABLE "{NUMBER_TABLE}" ADD PRIMARY KEY ("claim_number")')
+    cursor.execute(f'''
+        CREATE FUNCTION "{NUMBER_TRIGGER}"() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM "{NUMBER_TABLE}" WHERE "claim_number" = OLD."claim_number";
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO "{NUMBER_TABLE}" VALUES (NEW."claim_number");
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    ''')
+    cursor.execute(
+        f'CREATE TRIGGER "{NUMBER_TRIGGER}" AFTER INSERT OR DELETE OR UPDATE OF "claim_number" '
+        f'ON "{TABLE}" FOR EACH ROW EXECUTE FUNCTION "{NUMBER_TRIGGER}"()'
+    )
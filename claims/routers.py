@@ -0,0 +1,96 @@
+"""Read-replica routing.
+
+Views decorated with ``replica_reads`` read claims data (the models in
+``REPLICA_MODELS``) from the ``replica`` database alias when one is
+configured (REPLICA_DATABASE_URL); everything else, and every write, uses
+``default``. Auth, session and user profile tables always stay on
+``default`` so logins and role changes take effect immediately. After a user writes
+anything, ``claims.middleware.ReplicaPinMiddleware`` pins their reads to
+``default`` for REPLICA_PIN_SECONDS, so they see their own flags and notes
+even while the replica lags.
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_SESSION_KEY = '_claims_primary_until'
+
+# Read-heavy claims models; UserProfile (roles) is left out on purpose
+REPLICA_MODELS = {
+    'claims.claim',
+    'claims.claimdetail',
+    'claims.flag',
+    'claims.note',
+    'claims.activityevent',
+    'claims.agingsnapshot',
+    'claims.archivedclaim',
+}
+
+_replica_reads = ContextVar('claims_replica_reads', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def is_pinned(request):
+    """True while the user's recent write should be read back from the primary"""
+    return request.session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def pin_to_primary(request):
+    request.session[PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+
+
+def replica_reads(view_func):
+    """Route the view's claims queries to the replica unless the user is pinned"""
+    def use_replica(request):
+        return replica_configured() and not (request.user.is_authenticated and is_pinned(request))
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # Resolve the lazy user/session off the event loop before choosing
+            if not await sync_to_async(use_replica)(request):
+                return await view_func(request, *args, **kwargs)
+            token = _replica_reads.set(True)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not use_replica(request):
+            return view_func(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Claims data reads go to the replica inside replica_reads views; all else to default"""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and model._meta.label_lower in REPLICA_MODELS and replica_configured():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so instances read from the replica are still saved to default
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+
+
+SEARCH_SEQ_KEY = 'claims_search_seq:{user_id}'
+SEARCH_PAGES_KEY = 'claims_search_pages:v2:{user_id}'  # v2: integer claim keys
+
+
+def parse_search_seq(request):
+    """Return the client-side search sequence token, or None if absent
+
+    Only live HTMX searches are sequenced: full page loads, bookmarks and
+    history restores must always render, whatever searches came before.
+    """
+    if 'HX-Request' not in request.headers or 'HX-History-Restore-Request' in request.headers:
+        return None
+    try:
+        return int(request.headers.get('X-Search-Seq', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def register_search_seq(request, seq):
+    """Record seq as the user's latest search; return False if a newer one already arrived"""
+    if seq is None:
+        return True
+    key = SEARCH_SEQ_KEY.format(user_id=request.user.pk)
+    latest = cache.get(key)
+    if latest is not None and seq < latest:
+        return False
+    cache.set(key, seq, settings.CLAIMS_SEARCH_CACHE_TTL)
+    return True
+
+
+def is_superseded(request, seq):
+    """True if a newer search from the same user arrived while this one was running"""
+    if seq is None:
+        return False
+    latest = cache.get(SEARCH_SEQ_KEY.format(user_id=request.user.pk))
+    return latest is not None and seq < latest
+
+
+def search_cache_key(filter_params, per_page, page):
+    """Build the lookup key for one filtered result page"""
+    params = dict(filter_params, search=filter_params.get('search', '').strip().lower())
+    return (tuple(sorted(params.items())), per_page, str(page))
+
+
+def get_cached_page(request, cache_key, claims):
+    """Rebuild a Page from cached claim IDs, or return None on miss
+
+    Only the IDs of the page are cached, so rows (and flag state) are always
+    fetched fresh with a single primary key lookup.
+    """
+    entries = cache.get(SEARCH_PAGES_KEY.format(user_id=request.user.pk)) or []
+    for key, ids, count, number, per_page in entries:
+        if key == cache_key:
+            break
+    else:
+        return None
+
+    paginator = Paginator(claims, per_page)
+    # Seed the cached count so the paginator never issues COUNT(*)
+    paginator.count = count
+    rows = claims.in_bulk(ids)
+    return Page([rows[claim_id] for claim_id in ids if claim_id in rows], number, paginator)
+
+
+def cache_page(request, cache_key, claims_page):
+    """Remember the IDs of a result page in the user's most-recent-first cache"""
+    key = SEARCH_PAGES_KEY.format(user_id=request.user.pk)
+    entries = [entry for entry in cache.get(key) or [] if entry[0] != cache_key]
+    entries.insert(0, (
+        cache_key,
+        [claim.pk for claim in claims_page],
+        claims_page.paginator.count,
+        claims_page.number,
+        claims_page.paginator.per_page,
+    ))
+    cache.set(key, entries[:settings.CLAIMS_SEARCH_CACHE_SIZE], settings.CLAIMS_SEARCH_CACHE_TTL)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    """Give every new user (registration, Google OAuth, createsuperuser) a 'user' profile"""
+    if created and not raw:
+        UserProfile.objects.get_or_create(user=instance, defaults={'role': 'user'})
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS (WAL, busy timeout, cache sizes) to each new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            if value in ('', None):
+                continue
+            cursor.execute(f'PRAGMA {pragma} = {value}')
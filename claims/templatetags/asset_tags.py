@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from claims import assets
+
+register = template.Library()
+
+
+@register.inclusion_tag('claims/partials/asset_tags.html')
+def asset_tags():
+    """<head> tags for styles and scripts: the built bundles, or the CDNs in development"""
+    deferred = set(assets.DEFERRED_SCRIPTS)
+    if settings.ASSET_BUNDLES:
+        app_script = ''
+    else:
+        # Re-read on every page while developing; otherwise once per process
+        read = assets.read_static if settings.DEBUG else assets.cached_read_static
+        app_script = mark_safe(read(assets.APP_SCRIPT))
+    return {
+        'asset_bundles': settings.ASSET_BUNDLES,
+        'style_bundle': assets.STYLE_BUNDLE,
+        'script_bundle': assets.SCRIPT_BUNDLE,
+        'deferred_scripts': assets.DEFERRED_SCRIPTS,
+        'tailwind_cdn': assets.TAILWIND_PLAY_CDN,
+        'cdn_scripts': [url for path, url in assets.VENDOR_SCRIPTS.items() if path not in deferred],
+        'cdn_deferred_scripts': [assets.VENDOR_SCRIPTS[path] for path in assets.DEFERRED_SCRIPTS],
+        'app_script': app_script,
+    }
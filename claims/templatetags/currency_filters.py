@@ -1,11 +1,31 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
 from django import template
 
 register = template.Library()
 
+CENTS = Decimal('0.01')
+
+
+@lru_cache(maxsize=4096)
+def format_currency(amount):
+    """'$1,234.56' for a Decimal, rounded half-up to cents without going through float"""
+    return f"${amount.quantize(CENTS, rounding=ROUND_HALF_UP):,.2f}"
+
+
 @register.filter
 def currency(value):
     """Format a number as currency with commas"""
+    if not isinstance(value, Decimal):
+        if isinstance(value, float):
+            # str() keeps the shortest repr, not the binary expansion
+            value = str(value)
+        try:
+            value = Decimal(value)
+        except (InvalidOperation, ValueError, TypeError):
+            return value
     try:
-        return f"${float(value):,.2f}"
-    except (ValueError, TypeError):
+        return format_currency(value)
+    except InvalidOperation:
         return value
@@ -0,0 +1,25 @@
+from django import template
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.filter
+def relative_time(value):
+    """<time> element showing the absolute time; base.html rewrites it as e.g. '5 minutes ago'
+
+    The markup does not depend on when it is rendered, so fragments using it
+    can be cached; every timestamp on the page is formatted client-side
+    against one clock reading.
+    """
+    if not value:
+        return ''
+    local = timezone.localtime(value) if timezone.is_aware(value) else value
+    return format_html(
+        '<time datetime="{}" data-relative title="{}">{}</time>',
+        value.isoformat(),
+        date_format(local, 'DATETIME_FORMAT'),
+        date_format(local, 'M d, Y H:i'),
+    )
@@ -0,0 +1,800 @@
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SqliteDatabaseWrapper
+from django.http import QueryDict
+from django.template import Context, Template, engines
+from django.template.loader import render_to_string
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import activity, aging, archive, bulk, checks, dashboard, ingest, partitions, routers
+from .models import ActivityEvent, ArchivedClaim, Claim, ClaimDetail, Flag, Note, UserProfile
+from .backends import EmailOrUsernameBackend
+from .middleware import get_user_role
+from .templatetags.currency_filters import currency, format_currency
+from .templatetags.time_filters import relative_time
+from .views import claim_list_rows, get_claim_filters
+
+
+def make_claim(claim_number, billed='1000.00', paid='400.00', status='Paid'):
+    return Claim.objects.create(
+        claim_number=claim_number,
+        patient_name=f'Patient {claim_number}',
+        billed_amount=Decimal(billed),
+        paid_amount=Decimal(paid),
+        status=status,
+        insurer_name='Acme Health',
+        discharge_date=date(2024, 1, 15),
+    )
+
+
+def make_admin(username='admin'):
+    user = User.objects.create_user(username, f'{username}@example.com', 'password123')
+    UserProfile.objects.filter(user=user).update(role='admin')
+    return user
+
+
+class ClaimFiltersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.client.force_login(self.user)
+        make_claim('C-1')
+
+    def test_non_finite_min_underpayment_is_ignored(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-Infinity'):
+            with self.subTest(value=value):
+                filters = get_claim_filters(QueryDict(f'min_underpayment={value}'))
+                self.assertEqual(filters['min_underpayment'], '')
+
+                response = self.client.get(reverse('claims:claims_list'), {'min_underpayment': value})
+                self.assertEqual(response.status_code, 200)
+
+    def test_bulk_select_all_with_non_finite_min_underpayment(self):
+        for value in ('NaN', 'Infinity'):
+            with self.subTest(value=value):
+                response = self.client.post(reverse('claims:bulk_claim_action'), {
+                    'action': 'note',
+                    'content': 'Reviewed',
+                    'select_all': '1',
+                    'min_underpayment': value,
+                })
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['count'], 1)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reviewer', 'Reviewer@Example.com', 'password123')
+        self.backend = EmailOrUsernameBackend()
+
+    def test_username_or_email_in_one_lookup(self):
+        for login in ('reviewer', 'reviewer@example.com', 'REVIEWER@example.com'):
+            with self.subTest(login=login), self.assertNumQueries(1):
+                self.assertEqual(self.backend.authenticate(None, username=login, password='password123'), self.user)
+        self.assertIsNone(self.backend.authenticate(None, username='reviewer', password='wrong'))
+
+    def test_shared_email_is_refused(self):
+        User.objects.create_user('second', 'reviewer@example.com', 'password123')
+        self.assertIsNone(self.backend.authenticate(None, username='reviewer@example.com', password='password123'))
+        self.assertEqual(self.backend.authenticate(None, username='second', password='password123').username, 'second')
+
+    def test_login_by_email_and_cached_session(self):
+        response = self.client.post(reverse('claims:login'), {'username': 'reviewer@example.com', 'password': 'password123'})
+        self.assertRedirects(response, reverse('claims:claims_list'), fetch_redirect_response=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('claims:claims_list'))
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+
+class UserRoleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+        self.request.session = {}
+
+    def test_new_users_get_a_user_profile(self):
+        self.assertEqual(self.user.userprofile.role, 'user')
+
+    def test_role_is_cached_in_the_session_until_the_ttl(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_role(self.request), 'user')
+        UserProfile.objects.filter(user=self.user).update(role='admin')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_role(self.request), 'user')
+
+        expired = time.time() + settings.USER_ROLE_CACHE_TTL + 1
+        with mock.patch('claims.middleware.time.time', return_value=expired), self.assertNumQueries(1):
+            self.assertEqual(get_user_role(self.request), 'admin')
+
+    def test_admin_pages_check_the_role(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('claims:dashboard')).status_code, 403)
+
+        self.client.force_login(make_admin())
+        self.assertEqual(self.client.get(reverse('claims:dashboard')).status_code, 200)
+
+
+class DashboardPanelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(make_admin())
+        make_claim('C-1')
+
+    def test_dashboard_defers_panels(self):
+        response = self.client.get(reverse('claims:dashboard'), {'insurer': 'Acme'})
+        self.assertEqual(response.context['total_claims'], 1)
+        self.assertNotIn('top_underpayment', response.context)
+        for panel in dashboard.PANEL_TEMPLATES:
+            self.assertContains(response, f'hx-get="{reverse("claims:dashboard_panel", args=[panel])}?insurer=Acme"')
+
+    def test_panels_are_cached_per_filters(self):
+        url = reverse('claims:dashboard_panel', args=['top_underpayment'])
+        self.assertContains(self.client.get(url), 'C-1')
+
+        make_claim('C-2', paid='100.00')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertNotContains(response, 'C-2')
+        self.assertFalse([query for query in queries if 'claims_claim' in query['sql']])
+
+        self.assertContains(self.client.get(url, {'status': 'Paid'}), 'C-2')
+
+    def test_unknown_panel_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('claims:dashboard_panel', args=['kpis'])).status_code, 404)
+
+
+class AsyncDashboardTests(TransactionTestCase):
+    """Concurrent sections each open their own connection, so no wrapping transaction"""
+
+    filters = {'from_date': None, 'to_date': None, 'insurer': None, 'status': None}
+
+    def setUp(self):
+        make_claim('C-1')
+        make_claim('C-2', status='Denied')
+        make_claim('C-3', status='Under Review')
+        ClaimDetail.objects.create(claim=Claim.objects.get(claim_number='C-1'), cpt_codes='99213,99214')
+
+    def test_concurrent_sections_match_the_sequential_context(self):
+        expected = dashboard.build_dashboard_context(self.filters)
+        for max_concurrency in (1, 4):
+            with self.subTest(max_concurrency=max_concurrency):
+                context = async_to_sync(dashboard.abuild_dashboard_context)(
+                    self.filters, max_concurrency=max_concurrency,
+                )
+                self.assertEqual(context, expected)
+
+    @override_settings(DASHBOARD_MAX_CONCURRENCY=4)
+    def test_async_dashboard_renders_for_admins(self):
+        self.client.force_login(make_admin())
+
+        response = self.client.get(reverse('claims:dashboard_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_claims'], 3)
+
+
+class AgingTests(TestCase):
+    def test_labels_follow_the_edges(self):
+        self.assertEqual(aging.bucket_labels([30, 60, 90]), ['0-30', '31-60', '61-90', '90+'])
+        self.assertEqual(aging.bucket_labels([7]), ['0-7', '7+'])
+
+    def test_claims_are_counted_in_their_bucket(self):
+        today = date(2024, 6, 30)
+        for claim_number, days in (('C-1', 0), ('C-2', 30), ('C-3', 31), ('C-4', 90), ('C-5', 91), ('C-6', 400)):
+            claim = make_claim(claim_number, status='Under Review')
+            Claim.objects.filter(pk=claim.pk).update(discharge_date=today - timedelta(days=days))
+        make_claim('C-PAID')
+
+        breakdown = aging.aging_breakdown(Claim.objects.all(), edges=[30, 60, 90], today=today)
+        self.assertEqual(breakdown['totals'], {'0-30': 2, '31-60': 1, '61-90': 1, '90+': 2})
+        self.assertEqual(breakdown['by_insurer'], {'Acme Health': breakdown['totals']})
+
+    def test_invalid_edges_are_rejected(self):
+        for edges in ([], [60, 30], [30, 30, 90]):
+            with self.subTest(edges=edges):
+                with self.assertRaises(ValueError):
+                    aging.bucket_labels(edges)
+                with override_settings(CLAIMS_AGING_BUCKET_EDGES=edges):
+                    with self.assertRaises(ImproperlyConfigured):
+                        aging.get_bucket_edges()
+                    self.assertEqual([error.id for error in checks.check_aging_bucket_edges(None)], ['claims.E001'])
+
+
+class ClaimListQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.client.force_login(self.user)
+
+    def add_claims(self, start, count):
+        for n in range(start, start + count):
+            claim = make_claim(f'C-{n:03d}')
+            Flag.objects.create(claim=claim, user=self.user, reason='Check', is_resolved=n % 2 == 0)
+
+    def page_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('claims:claims_list'), {'per_page': 100}, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_rows_carry_flag_state_and_only_displayed_columns(self):
+        self.add_claims(0, 2)
+        with self.assertNumQueries(1):
+            rows = {claim.claim_number: claim for claim in claim_list_rows(Claim.objects.all())}
+            self.assertEqual(
+                [(rows[n].has_unresolved_flags, rows[n].has_resolved_flags) for n in ('C-000', 'C-001')],
+                [(False, True), (True, False)],
+            )
+        self.assertEqual(rows['C-000'].get_deferred_fields(), {'created_at', 'updated_at'})
+
+    def test_page_queries_do_not_grow_with_rows(self):
+        self.add_claims(0, 3)
+        few = self.page_queries()
+        self.add_claims(3, 30)
+        self.assertEqual(self.page_queries(), few)
+
+
+class SearchSequenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.client.force_login(self.user)
+        make_claim('C-1')
+        self.url = reverse('claims:claims_list')
+
+    def search(self, seq, **headers):
+        return self.client.get(self.url, {'search': 'C-1'}, HTTP_X_SEARCH_SEQ=str(seq), **headers)
+
+    def test_superseded_search_returns_no_content(self):
+        self.assertEqual(self.search(200, HTTP_HX_REQUEST='true').status_code, 200)
+        self.assertEqual(self.search(100, HTTP_HX_REQUEST='true').status_code, 204)
+
+    def test_full_page_and_history_restore_ignore_the_sequence(self):
+        self.search(200, HTTP_HX_REQUEST='true')
+
+        self.assertEqual(self.client.get(self.url, {'search': 'C-1', 'seq': '100'}).status_code, 200)
+        self.assertEqual(self.search(100).status_code, 200)
+        restore = self.search(100, HTTP_HX_REQUEST='true', HTTP_HX_HISTORY_RESTORE_REQUEST='true')
+        self.assertEqual(restore.status_code, 200)
+        self.assertContains(restore, 'C-1')
+
+
+class SqlitePragmaTests(SimpleTestCase):
+    @override_settings(SQLITE_PRAGMAS={
+        'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000, 'temp_store': 'MEMORY',
+    })
+    def test_new_connections_are_tuned(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sqlite = SqliteDatabaseWrapper({
+                **connections['default'].settings_dict,
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(tmpdir, 'tuned.sqlite3'),
+            }, alias='tuned')
+            try:
+                with sqlite.cursor() as cursor:
+                    pragmas = {}
+                    for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store'):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        pragmas[pragma] = cursor.fetchone()[0]
+            finally:
+                sqlite.close()
+        # synchronous NORMAL is 1, temp_store MEMORY is 2
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'temp_store': 2})
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.router = routers.ReplicaRouter()
+
+    def read_aliases(self, session):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = session
+
+        @routers.replica_reads
+        def view(request):
+            return {model: self.router.db_for_read(model) for model in (Claim, Flag, UserProfile, User)}
+
+        with mock.patch.object(routers, 'replica_configured', return_value=True):
+            return view(request)
+
+    def test_unpinned_claims_reads_use_the_replica(self):
+        aliases = self.read_aliases({})
+        self.assertEqual(aliases[Claim], 'replica')
+        self.assertEqual(aliases[Flag], 'replica')
+        self.assertEqual(aliases[UserProfile], 'default')
+        self.assertEqual(aliases[User], 'default')
+
+    def test_pinned_reads_use_the_primary(self):
+        aliases = self.read_aliases({routers.PIN_SESSION_KEY: time.time() + 60})
+        self.assertEqual(set(aliases.values()), {'default'})
+
+    def test_reads_outside_replica_views_use_the_primary(self):
+        with mock.patch.object(routers, 'replica_configured', return_value=True):
+            self.assertEqual(self.router.db_for_read(Claim), 'default')
+
+
+class BulkFlagTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password123')
+        self.claims = [make_claim(f'C-{n}') for n in range(3)]
+
+    def test_already_flagged_claims_are_skipped(self):
+        Flag.objects.create(claim=self.claims[0], user=self.other, reason='Existing')
+
+        count = bulk.bulk_flag(Claim.objects.all(), self.user, 'Bulk review')
+
+        self.assertEqual(count, 2)
+        events = ActivityEvent.objects.filter(event_type='flag_created')
+        self.assertEqual(sorted(events.values_list('claim_id', flat=True)), [self.claims[1].pk, self.claims[2].pk])
+
+    def test_claim_flagged_concurrently_is_not_counted(self):
+        bulk_create = Flag.objects.bulk_create
+
+        def flag_first_claim_then_insert(*args, **kwargs):
+            # Another request flags a claim between the SELECT and the INSERT
+            Flag.objects.create(claim=self.claims[0], user=self.other, reason='Concurrent')
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(Flag.objects, 'bulk_create', side_effect=flag_first_claim_then_insert):
+            count = bulk.bulk_flag(Claim.objects.all(), self.user, 'Bulk review')
+
+        self.assertEqual(count, 2)
+        events = ActivityEvent.objects.filter(event_type='flag_created')
+        self.assertEqual(sorted(events.values_list('claim_id', flat=True)), [self.claims[1].pk, self.claims[2].pk])
+        self.assertEqual(Flag.objects.get(claim=self.claims[0], is_resolved=False).user, self.other)
+
+
+class ActivityTimelineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.claim = make_claim('C-1')
+        now = timezone.now()
+        self.events = []
+        # Events 1-3 share one timestamp, so pages must break ties on id
+        for n, minutes in enumerate([-1, 0, 0, 0, 1]):
+            event = activity.record_event(self.claim.pk, 'note_added', self.user, f'Note {n}')
+            ActivityEvent.objects.filter(pk=event.pk).update(created_at=now + timedelta(minutes=minutes))
+            self.events.append(event)
+
+    def test_pages_cover_a_created_at_tie_without_gaps(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            with self.assertNumQueries(1):
+                events, cursor = activity.activity_page(ActivityEvent.objects.all(), cursor, limit=2)
+            seen += [event.pk for event in events]
+            pages += 1
+            if cursor is None:
+                break
+        expected = [event.pk for event in self.events]
+        self.assertEqual(seen, [expected[4], expected[3], expected[2], expected[1], expected[0]])
+        self.assertEqual(pages, 3)
+
+    def test_malformed_cursor_starts_from_the_top(self):
+        events, cursor = activity.activity_page(ActivityEvent.objects.all(), 'not-a-cursor', limit=2)
+        self.assertEqual(events[0].pk, self.events[4].pk)
+        self.assertIsNotNone(cursor)
+
+    def test_claim_timeline_links_the_next_page(self):
+        self.client.force_login(self.user)
+        url = reverse('claims:claim_activity', args=[self.claim.pk])
+        with override_settings(ACTIVITY_PAGE_SIZE=3):
+            response = self.client.get(url)
+            self.assertContains(response, 'Note 4')
+            self.assertNotContains(response, 'Note 0')
+            next_url = f'{url}?before={activity.encode_cursor(response.context["events"][-1])}'
+            self.assertContains(response, f'hx-get="{next_url}"')
+
+            response = self.client.get(next_url)
+            self.assertContains(response, 'Note 0')
+            self.assertNotContains(response, 'Note 4')
+            self.assertIsNone(response.context['next_cursor'])
+
+
+class LiveUpdatesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.client.force_login(self.user)
+        self.claim = make_claim('C-1')
+
+    @override_settings(LIVE_UPDATES_ENABLED=False)
+    def test_disabled_endpoint_returns_no_content(self):
+        response = self.client.get(reverse('claims:live_events'), {'claim': self.claim.pk})
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(LIVE_UPDATES_ENABLED=False)
+    def test_disabled_pages_do_not_connect(self):
+        response = self.client.get(reverse('claims:claim_detail', args=[self.claim.claim_number]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'sse-connect')
+        self.assertContains(response, reverse('claims:claim_activity', args=[self.claim.pk]))
+
+    @override_settings(LIVE_UPDATES_ENABLED=True)
+    def test_enabled_pages_connect(self):
+        response = self.client.get(reverse('claims:claim_detail', args=[self.claim.claim_number]))
+        self.assertContains(response, 'sse-connect')
+
+
+class LoadClaimDetailsTests(TestCase):
+    def setUp(self):
+        self.claims = [make_claim(f'C-{n}') for n in range(3)]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def load(self, rows):
+        path = os.path.join(self.tmpdir.name, 'details.csv')
+        with open(path, 'w', newline='') as f:
+            f.write('claim_id,cpt_codes,denial_reason\n')
+            for row in rows:
+                f.write(','.join(row) + '\n')
+        stdout = StringIO()
+        with override_settings(IMPORT_REJECTS_DIR=self.tmpdir.name):
+            call_command('load_claim_details', file=path, format='csv', stdout=stdout)
+        return stdout.getvalue()
+
+    def test_only_changed_details_count_as_updated(self):
+        output = self.load([('C-0', '99213', ''), ('C-1', '99214', '')])
+        self.assertIn('2 created, 0 updated', output)
+
+        output = self.load([('C-0', '99213', ''), ('C-1', '99215', ''), ('C-2', '80053', '')])
+        self.assertIn('1 created, 1 updated', output)
+        self.assertEqual(ClaimDetail.objects.get(claim=self.claims[1]).cpt_codes, '99215')
+
+
+class LoadClaimsDataTests(TestCase):
+    """Runs the executemany ingestor on SQLite and the COPY ingestor on PostgreSQL"""
+
+    HEADER = 'id,patient_name,billed_amount,paid_amount,status,insurer_name,discharge_date,cpt_codes,denial_reason'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def load(self, rows, **options):
+        path = os.path.join(self.tmpdir.name, 'claims.csv')
+        with open(path, 'w', newline='') as f:
+            f.write('\n'.join([self.HEADER, *rows]) + '\n')
+        stdout = StringIO()
+        with override_settings(IMPORT_REJECTS_DIR=self.tmpdir.name):
+            call_command('load_claims_data', file=path, format='csv', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_reload_updates_in_place_and_clear_replaces(self):
+        output = self.load([
+            '30001,Ann Lee,1000.00,400.00,Paid,Aetna,2024-01-15,"99213, 80053",',
+            '30002,Bo Kim,500.00,0.00,Denied,Cigna,2024-02-01,99214,Not covered',
+        ])
+        self.assertIn('2 created, 0 updated', output)
+        key = Claim.objects.get(claim_number='30001').pk
+
+        output = self.load(['30001,Ann Lee,1000.00,900.00,Paid,Aetna,2024-01-15,"99213, 80053",'])
+        self.assertIn('0 created, 1 updated', output)
+        claim = Claim.objects.get(claim_number='30001')
+        self.assertEqual((claim.pk, claim.underpayment), (key, Decimal('100.00')))
+
+        self.load(['30003,Cy Ray,200.00,50.00,Paid,Aetna,2024-03-01,99215,'], clear=True)
+        self.assertEqual(list(Claim.objects.values_list('claim_number', flat=True)), ['30003'])
+        self.assertEqual(ClaimDetail.objects.get().claim.claim_number, '30003')
+
+
+class IngestorTests(TestCase):
+    def row(self, claim_number, paid='400.00', cpt_codes='99213'):
+        return {
+            'claim_number': claim_number,
+            'patient_name': f'Patient {claim_number}',
+            'billed_amount': Decimal('1000.00'),
+            'paid_amount': Decimal(paid),
+            'status': 'Paid',
+            'insurer_name': 'Acme Health',
+            'discharge_date': date(2024, 1, 15),
+            'cpt_codes': cpt_codes,
+            'denial_reason': '',
+        }
+
+    def test_merge_claims_inserts_and_updates_in_one_chunk(self):
+        ingestors = [ingest.ExecutemanyIngestor]
+        if connection.vendor == 'postgresql':
+            ingestors.append(ingest.CopyIngestor)
+        for ingestor_class in ingestors:
+            with self.subTest(ingestor=ingestor_class.__name__), transaction.atomic():
+                with_detail = make_claim('C-1')
+                ClaimDetail.objects.create(claim=with_detail, cpt_codes='99999')
+                without_detail = make_claim('C-2')
+
+                created, updated = ingestor_class().merge_claims([
+                    self.row('C-1', paid='900.00'), self.row('C-2'), self.row('C-3'),
+                ])
+
+                new = Claim.objects.get(claim_number='C-3')
+                self.assertEqual(created, [new.pk])
+                self.assertEqual(sorted(updated), [with_detail.pk, without_detail.pk])
+                self.assertEqual(Claim.objects.get(pk=with_detail.pk).underpayment, Decimal('100.00'))
+                self.assertEqual(
+                    sorted(ClaimDetail.objects.values_list('claim__claim_number', 'cpt_codes')),
+                    [('C-1', '99999'), ('C-2', '99213'), ('C-3', '99213')],
+                )
+                transaction.set_rollback(True)
+
+    def test_incomplete_ingestor_fails_when_created(self):
+        class ClaimsOnlyIngestor(ingest.Ingestor):
+            def _merge_claims(self, rows):
+                return [], []
+
+        with self.assertRaises(TypeError):
+            ClaimsOnlyIngestor()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL schema')
+class PostgresClaimKeyTests(TestCase):
+    """The schema 0010_claim_integer_key leaves behind on PostgreSQL"""
+
+    def test_claim_key_is_an_identity_bigint(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT data_type, is_identity FROM information_schema.columns "
+                "WHERE table_name = 'claims_claim' AND column_name = 'id'"
+            )
+            self.assertEqual(cursor.fetchone(), ('bigint', 'YES'))
+
+    def test_related_tables_reference_the_integer_key(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT conrelid::regclass::text, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE contype = 'f' AND confrelid = 'claims_claim'::regclass"
+            )
+            references = dict(cursor.fetchall())
+        for table in ('claims_claimdetail', 'claims_flag', 'claims_note', 'claims_activityevent'):
+            self.assertIn('FOREIGN KEY (claim_id) REFERENCES claims_claim(id)', references[table])
+
+    def test_new_claims_get_increasing_keys(self):
+        first, second = make_claim('C-1'), make_claim('C-2')
+        self.assertEqual(second.pk, first.pk + 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL partitioning')
+class PartitionedClaimsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.old = make_claim('C-OLD')
+        self.new = Claim.objects.create(
+            claim_number='C-NEW', patient_name='New', billed_amount=10, paid_amount=0,
+            status='Paid', insurer_name='Acme Health', discharge_date=date(2024, 6, 1),
+        )
+        for claim in (self.old, self.new):
+            ClaimDetail.objects.create(claim=claim, cpt_codes='99213')
+            Flag.objects.create(claim=claim, user=self.user, reason='Check')
+        with connection.cursor() as cursor:
+            # Run the deferred FK checks now; convert() cannot drop a
+            # constraint with checks pending in the same transaction
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        partitions.convert()
+
+    def tearDown(self):
+        # The conversion is rolled back with the test
+        partitions.claims_partitioned.cache_clear()
+
+    def test_detach_archives_dependent_rows(self):
+        detached = dict(partitions.detach_partitions(date(2024, 2, 1), archive_schema='claims_archive_test'))
+        self.assertEqual(detached['claims_claim_y2024m01'], {
+            'claims_claimdetail': 1, 'claims_flag': 1, 'claims_note': 0, 'claims_activityevent': 0,
+        })
+        self.assertEqual(list(Flag.objects.values_list('claim_id', flat=True)), [self.new.pk])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT "claim_id" FROM "claims_archive_test"."claims_flag"')
+            self.assertEqual(cursor.fetchall(), [(self.old.pk,)])
+
+    def test_drop_deletes_dependent_rows(self):
+        partitions.detach_partitions(date(2024, 2, 1), drop=True)
+        self.assertEqual(list(ClaimDetail.objects.values_list('claim_id', flat=True)), [self.new.pk])
+        self.assertEqual(list(Flag.objects.values_list('claim_id', flat=True)), [self.new.pk])
+
+        # The detached claim's number can be imported again
+        make_claim('C-OLD')
+
+    def test_claim_numbers_stay_unique_across_partitions(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Claim.objects.create(
+                claim_number='C-OLD', patient_name='Other', billed_amount=10, paid_amount=0,
+                status='Paid', insurer_name='Acme Health', discharge_date=date(2024, 6, 1),
+            )
+
+        # Moving a claim to another month keeps its number
+        Claim.objects.filter(pk=self.old.pk).update(discharge_date=date(2024, 6, 2))
+        Claim.objects.filter(pk=self.old.pk).update(claim_number='C-MOVED')
+        make_claim('C-OLD')
+        self.assertEqual(Claim.objects.count(), 3)
+
+    def test_flag_for_missing_claim_is_rejected(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('claims:add_flag', args=[self.new.pk + 100]), {'reason': 'Check'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Flag.objects.count(), 2)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.client.force_login(self.user)
+        claim = make_claim('C-ARCH')
+        ClaimDetail.objects.create(claim=claim, cpt_codes='99213')
+
+    def test_archived_claim_is_found_by_claim_number(self):
+        self.assertEqual(archive.archive_claims(Claim.objects.all()), 1)
+        self.assertEqual(str(ArchivedClaim.objects.get()), 'C-ARCH - Patient C-ARCH (archived)')
+
+        response = self.client.get(reverse('claims:claim_detail', args=['C-ARCH']))
+        self.assertContains(response, 'C-ARCH')
+        response = self.client.get(reverse('claims:claims_list'), {'search': 'C-ARCH'})
+        self.assertContains(response, reverse('claims:claim_detail', args=['C-ARCH']))
+
+    def test_claim_changed_after_snapshot_is_skipped(self):
+        claim_record = archive.claim_record
+
+        def add_note_then_record(claim):
+            record = claim_record(claim)
+            Note.objects.create(claim=claim, user=self.user, content='Added while archiving')
+            return record
+
+        with mock.patch.object(archive, 'claim_record', add_note_then_record):
+            self.assertEqual(archive.archive_claims(Claim.objects.all()), 0)
+
+        self.assertFalse(ArchivedClaim.objects.exists())
+        claim = Claim.objects.get(claim_number='C-ARCH')
+        self.assertEqual(claim.notes.get().content, 'Added while archiving')
+        self.assertEqual(archive.archive_claims(Claim.objects.all()), 1)
+        self.assertEqual(archive.get_archived_claim('C-ARCH')['notes'][0]['content'], 'Added while archiving')
+
+
+class DataUploadTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password123')
+        UserProfile.objects.update_or_create(user=admin, defaults={'role': 'admin'})
+        self.client.force_login(admin)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_upload_loads_claims_and_details(self):
+        claims_csv = (
+            f'{LoadClaimsDataTests.HEADER}\n'
+            '30001,Ann Lee,1000.00,400.00,Paid,Aetna,2024-01-15,99213,\n'
+            '30002,Bo Kim,oops,0.00,Denied,Cigna,2024-02-01,99214,\n'
+        )
+        details_csv = 'claim_id,cpt_codes,denial_reason\n30001,"99213, 80053",\n'
+        with override_settings(IMPORT_REJECTS_DIR=self.tmpdir.name), \
+                mock.patch('sys.stdout', new_callable=StringIO):
+            response = self.client.post(reverse('claims:data_upload'), {
+                'claims_file': SimpleUploadedFile('claims.csv', claims_csv.encode()),
+                'details_file': SimpleUploadedFile('details.csv', details_csv.encode()),
+                'file_format': 'csv',
+            })
+
+        self.assertRedirects(response, reverse('claims:dashboard'), fetch_redirect_response=False)
+        self.assertEqual(ClaimDetail.objects.get(claim__claim_number='30001').cpt_codes, '99213, 80053')
+        warnings = [str(message) for message in get_messages(response.wsgi_request) if message.level_tag == 'warning']
+        self.assertEqual(len(warnings), 1)
+        self.assertTrue(warnings[0].startswith('1 claims rows were rejected'))
+
+
+class ProfileStartupTests(TestCase):
+    """Cold-start budget for SLIM_STARTUP (about 640 modules here, against 890 without it)"""
+
+    MAX_MODULES = 750
+    MAX_MS = 3000
+
+    def profile(self, *args):
+        stdout = StringIO()
+        with mock.patch.dict(os.environ, {'SLIM_STARTUP': 'True'}):
+            call_command('profile_startup', '--repeat', '1', '--top', '0', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_slim_startup_is_within_budget(self):
+        output = self.profile('--max-modules', str(self.MAX_MODULES), '--max-ms', str(self.MAX_MS))
+        self.assertIn('Within budget', output)
+
+    def test_exceeding_the_budget_fails(self):
+        with self.assertRaisesMessage(CommandError, 'modules exceeds 10'):
+            self.profile('--max-modules', '10')
+
+
+class CurrencyFilterTests(SimpleTestCase):
+    def test_amounts_round_half_up_to_cents(self):
+        cases = [
+            (Decimal('1234.565'), '$1,234.57'),
+            (Decimal('-0.005'), '$-0.01'),
+            (2.675, '$2.68'),  # 2.67499... as a binary float
+            (1500, '$1,500.00'),
+            ('99.9', '$99.90'),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(currency(value), expected)
+
+    def test_non_numbers_pass_through(self):
+        for value in (None, '', 'n/a'):
+            with self.subTest(value=value):
+                self.assertIs(currency(value), value)
+
+    def test_repeated_amounts_are_memoized(self):
+        format_currency.cache_clear()
+        rendered = Template('{% load currency_filters %}{% for v in values %}{{ v|currency }} {% endfor %}').render(
+            Context({'values': [Decimal('10.00')] * 5})
+        )
+        self.assertEqual(rendered, '$10.00 ' * 5)
+        self.assertEqual(format_currency.cache_info()[:2], (4, 1))  # hits, misses
+
+    def test_templates_are_compiled_once(self):
+        engine = engines['django'].engine
+        self.assertIsInstance(engine.template_loaders[0], CachedLoader)
+        self.assertIs(
+            engine.get_template('claims/partials/claims_table.html'),
+            engine.get_template('claims/partials/claims_table.html'),
+        )
+
+
+class RelativeTimeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', 'reviewer@example.com', 'password123')
+        self.note = Note.objects.create(claim=make_claim('C-1'), user=self.user, content='Checked')
+
+    def test_note_markup_does_not_depend_on_render_time(self):
+        renders = []
+        for later in (timedelta(0), timedelta(days=3)):
+            with mock.patch('django.utils.timezone.now', return_value=self.note.created_at + later):
+                renders.append(render_to_string('claims/partials/note_item.html', {'note': self.note}))
+        self.assertEqual(renders[0], renders[1])
+        self.assertIn(f'<time datetime="{self.note.created_at.isoformat()}" data-relative', renders[0])
+
+    def test_empty_value_renders_nothing(self):
+        self.assertEqual(relative_time(None), '')
+
+    def test_time_ago_boundaries(self):
+        cases = [
+            (timedelta(seconds=-5), 'Just now'),
+            (timedelta(seconds=59), 'Just now'),
+            (timedelta(minutes=1), '1 minute ago'),
+            (timedelta(hours=1), '1 hour ago'),
+            (timedelta(days=2, hours=3), '2 days ago'),
+        ]
+        for elapsed, expected in cases:
+            with self.subTest(elapsed=elapsed):
+                with mock.patch('django.utils.timezone.now', return_value=self.note.created_at + elapsed):
+                    self.assertEqual(self.note.time_ago, expected)
+
+
+class AssetTagsTests(TestCase):
+    @override_settings(ASSET_BUNDLES=False)
+    def test_unbundled_pages_inline_the_app_script(self):
+        response = self.client.get(reverse('claims:login'))
+        self.assertContains(response, 'function formatRelativeTimes')
+        self.assertNotContains(response, 'js/app.js')
+
+    @override_settings(ASSET_BUNDLES=True)
+    def test_bundled_pages_load_the_bundles(self):
+        response = self.client.get(reverse('claims:login'))
+        self.assertContains(response, 'bundles/app.js')
+        self.assertContains(response, 'bundles/app.css')
+        self.assertNotContains(response, 'cdn.tailwindcss.com')
@@ -12,12 +12,20 @@ urlpatterns = [
     
     # Main application URLs
     path('', views.claims_list, name='claims_list'),
-    path('claim/<str:claim_id>/', views.claim_detail, name='claim_detail'),
+    path('claim/<str:claim_number>/', views.claim_detail, name='claim_detail'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/async/', views.dashboard_async, name='dashboard_async'),
+    path('dashboard/panel/<str:panel>/', views.dashboard_panel, name='dashboard_panel'),
     path('upload/', views.data_upload, name='data_upload'),
     
     # Action URLs
     path('claim/<int:claim_id>/flag/', views.add_flag, name='add_flag'),
     path('claim/<int:claim_id>/note/', views.add_note, name='add_note'),
     path('claim/<int:claim_id>/resolve-flag/', views.resolve_flag, name='resolve_flag'),
+    path('bulk/', views.bulk_claim_action, name='bulk_claim_action'),
+    
+    # Activity timeline partials
+    path('activity/', views.activity_timeline, name='activity_timeline'),
+    path('claim/<int:claim_id>/activity/', views.claim_activity, name='claim_activity'),
+    path('live/', views.live_events, name='live_events'),
 ]
@@ -1,29 +1,37 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control, cache_page
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q, Sum, Count, Avg, F, Case, When, FloatField
-from django.db import models
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.db.models import Q, Exists, OuterRef
+from django.db import IntegrityError, transaction
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.forms import UserCreationForm
 from django import forms
-from datetime import datetime, timedelta
-from collections import Counter
+from decimal import Decimal, InvalidOperation
 import json
 import os
-import tempfile
-from django.db import connection
+from asgiref.sync import sync_to_async
 
-from .models import Claim, ClaimDetail, Flag, Note, UserProfile
+from .middleware import get_user_role
+from .routers import replica_reads
+from .models import ActivityEvent, Claim, Flag, Note
 from .forms import DataUploadForm
-from .management.commands.load_claims_data import Command as LoadDataCommand
+from . import activity, archive, bulk, live, partitions
+from . import search as search_cache
+from .dashboard import (
+    PANEL_TEMPLATES, get_dashboard_filters, build_header_context, build_panel_context,
+    abuild_dashboard_context,
+)
 
 
 def admin_required(view_func):
@@ -31,11 +39,7 @@ def admin_required(view_func):
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             return redirect('claims:login')
-        try:
-            profile = request.user.userprofile
-            if not profile.is_admin:
-                return render(request, 'claims/not_authorized.html', status=403)
-        except UserProfile.DoesNotExist:
+        if get_user_role(request) != 'admin':
             return render(request, 'claims/not_authorized.html', status=403)
         return view_func(request, *args, **kwargs)
     return wrapper
@@ -71,8 +75,7 @@ class CustomUserCreationForm(UserCreationForm):
         user.last_name = self.cleaned_data["last_name"]
         user.email = self.cleaned_data["email"]
         if commit:
-            user.save()
-            UserProfile.objects.create(user=user, role='user')
+            user.save()  # post_save signal creates the 'user' profile
         return user
 
 
@@ -92,7 +95,10 @@ def register_view(request):
     else:
         form = CustomUserCreationForm()
     
-    return render(request, 'claims/register.html', {'form': form})
+    return render(request, 'claims/register.html', {
+        'form': form,
+        'google_login_enabled': settings.GOOGLE_OAUTH_ENABLED,
+    })
 
 
 def login_view(request):
@@ -101,35 +107,21 @@ def login_view(request):
         username_or_email = request.POST.get('username')
         password = request.POST.get('password')
         
-        # Try to authenticate with username first
+        # EmailOrUsernameBackend matches either in a single lookup
         user = authenticate(request, username=username_or_email, password=password)
         
-        # If username authentication fails, try with email
-        if user is None:
-            try:
-                # Find user by email
-                user_obj = User.objects.get(email=username_or_email)
-                user = authenticate(request, username=user_obj.username, password=password)
-            except User.DoesNotExist:
-                user = None
-        
         if user:
             login(request, user)
             # Use the actual username for the welcome message
             messages.success(request, f'Welcome back, {user.username}!')
             # Redirect based on role
-            try:
-                profile = user.userprofile
-                if profile.is_admin:
-                    return redirect('claims:dashboard')
-                else:
-                    return redirect('claims:claims_list')
-            except UserProfile.DoesNotExist:
-                return redirect('claims:claims_list')
+            if get_user_role(request) == 'admin':
+                return redirect('claims:dashboard')
+            return redirect('claims:claims_list')
         else:
             messages.error(request, 'Invalid username/email or password')
     
-    return render(request, 'claims/login.html')
+    return render(request, 'claims/login.html', {'google_login_enabled': settings.GOOGLE_OAUTH_ENABLED})
 
 
 @login_required
@@ -141,37 +133,103 @@ def logout_view(request):
     return redirect('claims:login')
 
 
-def create_user_profile(user):
-    """Create user profile for new users (including Google OAuth users)"""
-    if not hasattr(user, 'userprofile'):
-        UserProfile.objects.create(user=user, role='user')
+CLAIM_SORT_CHOICES = [
+    ('', 'Newest First'),
+    ('-underpayment', 'Highest Underpayment'),
+    ('underpayment', 'Lowest Underpayment'),
+]
 
+CLAIM_SORT_ORDERING = {
+    '': ('-id',),
+    '-underpayment': ('-underpayment', '-id'),
+    'underpayment': ('underpayment', 'id'),
+}
 
-@login_required
-def claims_list(request):
-    """Main claims list view with search, filter, and pagination functionality"""
-    # Ensure user has a profile
-    create_user_profile(request.user)
-    
-    claims = Claim.objects.all().order_by('-id')  # Order by newest first
+# Columns the claims table renders; everything else stays in the database
+CLAIM_LIST_FIELDS = (
+    'claim_number',
+    'patient_name',
+    'billed_amount',
+    'paid_amount',
+    'underpayment',
+    'status',
+    'insurer_name',
+    'discharge_date',
+)
+
+
+def get_claim_filters(params):
+    """Read the claims list filters (search/status/insurer/min_underpayment/sort) from a QueryDict"""
+    sort = params.get('sort', '')
+    if sort not in CLAIM_SORT_ORDERING:
+        sort = ''
+    min_underpayment = params.get('min_underpayment', '').strip()
+    if min_underpayment:
+        try:
+            if not Decimal(min_underpayment).is_finite():
+                min_underpayment = ''
+        except InvalidOperation:
+            min_underpayment = ''
+    return {
+        'search': params.get('search', ''),
+        'status': params.get('status', ''),
+        'insurer': params.get('insurer', ''),
+        'min_underpayment': min_underpayment,
+        'sort': sort,
+    }
+
+
+def filter_claim_list(filters):
+    """Claims queryset with the claims list filters and sort order applied"""
+    # Sorting - newest first by default, or by materialized underpayment
+    claims = Claim.objects.all().order_by(*CLAIM_SORT_ORDERING[filters['sort']])
     
     # Search functionality - ONLY patient name and claim ID
-    search_query = request.GET.get('search', '')
-    if search_query:
+    if filters['search']:
         claims = claims.filter(
-            Q(patient_name__icontains=search_query) |
-            Q(id__icontains=search_query)
+            Q(patient_name__icontains=filters['search']) |
+            Q(claim_number__icontains=filters['search'])
         )
     
     # Filter by status
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        claims = claims.filter(status=status_filter)
+    if filters['status']:
+        claims = claims.filter(status=filters['status'])
     
     # Filter by insurer
-    insurer_filter = request.GET.get('insurer', '')
-    if insurer_filter:
-        claims = claims.filter(insurer_name__icontains=insurer_filter)
+    if filters['insurer']:
+        claims = claims.filter(insurer_name__icontains=filters['insurer'])
+    
+    # Filter by minimum underpayment (uses the indexed underpayment column)
+    if filters['min_underpayment']:
+        claims = claims.filter(underpayment__gte=Decimal(filters['min_underpayment']))
+    
+    return claims
+
+
+def claim_list_rows(claims):
+    """Only the displayed columns, with flag state from EXISTS subqueries in the same query"""
+    return claims.only(*CLAIM_LIST_FIELDS).annotate(
+        has_unresolved_flags=Exists(Flag.objects.filter(claim=OuterRef('pk'), is_resolved=False)),
+        has_resolved_flags=Exists(Flag.objects.filter(claim=OuterRef('pk'), is_resolved=True)),
+    )
+
+
+@login_required
+@replica_reads
+def claims_list(request):
+    """Main claims list view with search, filter, and pagination functionality"""
+    # Drop searches superseded by a newer keystroke from the same user
+    seq = search_cache.parse_search_seq(request)
+    if not search_cache.register_search_seq(request, seq):
+        return HttpResponse(status=204)
+    
+    filter_params = get_claim_filters(request.GET)
+    claims = claim_list_rows(filter_claim_list(filter_params))
+    search_query = filter_params['search']
+    status_filter = filter_params['status']
+    insurer_filter = filter_params['insurer']
+    min_underpayment = filter_params['min_underpayment']
+    sort = filter_params['sort']
     
     # Pagination
     per_page = request.GET.get('per_page', 25)
@@ -182,18 +240,21 @@ def claims_list(request):
     except (ValueError, TypeError):
         per_page = 25
     
-    paginator = Paginator(claims, per_page)
     page = request.GET.get('page', 1)
     
-    try:
-        claims_page = paginator.page(page)
-    except (EmptyPage, PageNotAnInteger):
-        claims_page = paginator.page(1)
+    # Re-typed or backspaced searches are served from the per-user page cache
+    cache_key = search_cache.search_cache_key(filter_params, per_page, page)
+    claims_page = search_cache.get_cached_page(request, cache_key, claims)
+    if claims_page is None:
+        paginator = Paginator(claims, per_page)
+        try:
+            claims_page = paginator.page(page)
+        except (EmptyPage, PageNotAnInteger):
+            claims_page = paginator.page(1)
+        search_cache.cache_page(request, cache_key, claims_page)
     
-    # Add flag status to each claim for template
-    for claim in claims_page:
-        claim.has_unresolved_flags = claim.flags.filter(is_resolved=False).exists()
-        claim.has_resolved_flags = claim.flags.filter(is_resolved=True).exists()
+    if search_cache.is_superseded(request, seq):
+        return HttpResponse(status=204)
     
     # Get filter options
     status_choices = [
@@ -205,14 +266,25 @@ def claims_list(request):
     
     insurers = Claim.objects.values_list('insurer_name', flat=True).distinct().order_by('insurer_name')
     
+    # Nothing in the hot table: look for the claim among archived ones
+    archived_matches = []
+    if not claims_page.paginator.count and (search_query or status_filter or insurer_filter):
+        archived_matches = archive.search_archive(filter_params)
+    
     context = {
         'claims': claims_page,
         'search_query': search_query,
         'status_filter': status_filter,
         'insurer_filter': insurer_filter,
+        'min_underpayment': min_underpayment,
+        'sort': sort,
+        'sort_choices': CLAIM_SORT_CHOICES,
         'per_page': per_page,
+        # Current filters as a query string prefix for pagination links
+        'filter_query': urlencode({**{k: v for k, v in filter_params.items() if v}, 'per_page': per_page}),
         'status_choices': status_choices,
         'insurers': insurers,
+        'archived_matches': archived_matches,
     }
     
     # Check if this is an HTMX request
@@ -225,9 +297,17 @@ def claims_list(request):
 
 
 @login_required
-def claim_detail(request, claim_id):
+@replica_reads
+def claim_detail(request, claim_number):
     """HTMX-powered claim detail view"""
-    claim = get_object_or_404(Claim, id=claim_id)
+    try:
+        claim = Claim.objects.get(claim_number=claim_number)
+    except Claim.DoesNotExist:
+        # Cold claims live in the archive; show them read-only
+        record = archive.get_archived_claim(claim_number)
+        if record is None:
+            raise Http404('No claim matches the given query.')
+        return render(request, 'claims/archived_claim_detail.html', {'claim': record})
     details = claim.details.first()
     flags = claim.flags.filter(is_resolved=False)
     notes = claim.notes.all()[:10]  # Show last 10 notes
@@ -260,6 +340,7 @@ def claim_detail(request, claim_id):
         'mode': mode,
         'has_active_flags': has_active_flags,
         'active_flag': active_flag,
+        'live_updates': settings.LIVE_UPDATES_ENABLED,
         # Add search parameters to context
         'search_query': search_query,
         'page': page,
@@ -284,23 +365,29 @@ def add_flag(request, claim_id):
             # Handle form data from HTMX
             reason = request.POST.get('reason', 'Flagged for review')
         
-        claim = get_object_or_404(Claim, id=claim_id)
+        # Partitioned claims have no foreign key to report a missing claim
+        if partitions.claims_partitioned() and not Claim.objects.filter(pk=claim_id).exists():
+            return JsonResponse({'success': False, 'message': 'Claim not found'}, status=404)
         
-        # Check if claim already has an unresolved flag
-        existing_flag = claim.flags.filter(is_resolved=False).first()
-        if existing_flag:
+        # Single INSERT; the one_active_flag_per_claim constraint rejects a
+        # second unresolved flag, even from concurrent requests
+        try:
+            with transaction.atomic():
+                flag = Flag.objects.create(
+                    claim_id=claim_id,
+                    user=request.user,  # Real authenticated user
+                    reason=reason
+                )
+                activity.record_event(flag.claim_id, 'flag_created', request.user, reason, flag.pk)
+        except IntegrityError:
+            # Only look the claim up on the failure path
+            if not Claim.objects.filter(pk=claim_id).exists():
+                return JsonResponse({'success': False, 'message': 'Claim not found'}, status=404)
             return JsonResponse({
                 'success': False,
                 'message': 'This claim is already flagged. Please resolve the existing flag first.'
             }, status=400)
         
-        # Use the authenticated user
-        flag = Flag.objects.create(
-            claim=claim,
-            user=request.user,  # Real authenticated user
-            reason=reason
-        )
-        
         return render(request, 'claims/partials/flag_item.html', {
             'flag': flag
         })
@@ -325,15 +412,17 @@ def add_note(request, claim_id):
             # Handle form data from HTMX
             content = request.POST.get('content', '')
             note_type = request.POST.get('note_type', 'user')
-        claim = get_object_or_404(Claim, id=claim_id)
+        claim = get_object_or_404(Claim, pk=claim_id)
         
         # Use the authenticated user
-        note = Note.objects.create(
-            claim=claim,
-            user=request.user,  # Real authenticated user
-            content=content,
-            note_type=note_type
-        )
+        with transaction.atomic():
+            note = Note.objects.create(
+                claim=claim,
+                user=request.user,  # Real authenticated user
+                content=content,
+                note_type=note_type
+            )
+            activity.record_event(claim.pk, 'note_added', request.user, content, note.pk)
         
         return render(request, 'claims/partials/note_item.html', {
             'note': note
@@ -351,20 +440,21 @@ def add_note(request, claim_id):
 def resolve_flag(request, claim_id):
     """Resolve a flag for a claim"""
     try:
-        claim = get_object_or_404(Claim, id=claim_id)
-        active_flag = claim.flags.filter(is_resolved=False).first()
+        # Resolve the (single) active flag with one UPDATE
+        with transaction.atomic():
+            resolved = Flag.objects.filter(claim_id=claim_id, is_resolved=False).update(
+                is_resolved=True,
+                resolved_at=timezone.now()
+            )
+            if resolved:
+                activity.record_event(claim_id, 'flag_resolved', request.user, 'Flag resolved')
         
-        if not active_flag:
+        if not resolved:
             return JsonResponse({
                 'success': False,
                 'message': 'No active flag found for this claim'
             }, status=400)
         
-        # Resolve the flag
-        active_flag.is_resolved = True
-        active_flag.resolved_at = timezone.now()
-        active_flag.save()
-        
         return JsonResponse({
             'success': True,
             'message': 'Flag resolved successfully'
@@ -376,219 +466,179 @@ def resolve_flag(request, claim_id):
         }, status=400)
 
 
+def _render_activity(request, events_qs, timeline_url, show_claim):
+    """Render one keyset page of events; the last row lazily loads the next page"""
+    events, next_cursor = activity.activity_page(events_qs, request.GET.get('before'))
+    return render(request, 'claims/partials/activity_timeline.html', {
+        'events': events,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('before'),
+        'timeline_url': timeline_url,
+        'show_claim': show_claim,
+    })
+
+
+@login_required
+@replica_reads
+def claim_activity(request, claim_id):
+    """Activity timeline for one claim (HTMX partial)"""
+    return _render_activity(
+        request,
+        ActivityEvent.objects.filter(claim_id=claim_id),
+        reverse('claims:claim_activity', args=[claim_id]),
+        show_claim=False,
+    )
+
+
 @login_required
 @admin_required
-def dashboard(request):
-    """Enhanced admin dashboard with comprehensive analytics"""
-    from .models import Claim, ClaimDetail, Flag, Note
-    
-    # Get filter parameters
-    from_date = request.GET.get('from_date')
-    to_date = request.GET.get('to_date')
-    insurer = request.GET.get('insurer')
-    status = request.GET.get('status')
-    
-    # Base queryset with filters
-    claims_qs = Claim.objects.all()
-    
-    # Apply date filters
-    if from_date:
-        try:
-            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-            claims_qs = claims_qs.filter(discharge_date__gte=from_date_obj)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
-    
-    if to_date:
+def activity_timeline(request):
+    """Activity timeline across all claims (HTMX partial)"""
+    return _render_activity(
+        request,
+        ActivityEvent.objects.all(),
+        reverse('claims:activity_timeline'),
+        show_claim=True,
+    )
+
+
+BULK_ACTIONS = ('flag', 'note', 'resolve')
+
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_claim_action(request):
+    """Flag, annotate or resolve many claims at once
+
+    Targets the posted claim_ids, or with select_all=1 every claim matching
+    the posted claims list filters.
+    """
+    action = request.POST.get('action')
+    if action not in BULK_ACTIONS:
+        return JsonResponse({'success': False, 'message': 'Unknown bulk action'}, status=400)
+    
+    if request.POST.get('select_all') == '1':
+        claims = filter_claim_list(get_claim_filters(request.POST))
+    else:
+        claim_ids = request.POST.getlist('claim_ids')
+        if not claim_ids:
+            return JsonResponse({'success': False, 'message': 'No claims selected'}, status=400)
         try:
-            to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-            claims_qs = claims_qs.filter(discharge_date__lte=to_date_obj)
+            claims = Claim.objects.filter(id__in=[int(claim_id) for claim_id in claim_ids])
         except ValueError:
-            pass  # Invalid date format, ignore filter
-    
-    # Apply insurer filter (use icontains for partial matching)
-    if insurer:
-        claims_qs = claims_qs.filter(insurer_name__icontains=insurer)
-    
-    # Apply status filter (handle case sensitivity and "All" option)
-    if status and status.lower() != 'all':
-        # Convert to proper case
-        status_map = {
-            'paid': 'Paid',
-            'denied': 'Denied', 
-            'under review': 'Under Review'
-        }
-        proper_status = status_map.get(status.lower(), status)
-        claims_qs = claims_qs.filter(status=proper_status)
-    
-    # A) Basic counts
-    total_claims = claims_qs.count()
-    paid_claims = claims_qs.filter(status='Paid').count()
-    denied_claims = claims_qs.filter(status='Denied').count()
-    under_review_claims = claims_qs.filter(status='Under Review').count()
-    
-    # B) Payment rates
-    payment_rate = 0
-    if total_claims > 0:
-        total_billed = claims_qs.aggregate(Sum('billed_amount'))['billed_amount__sum'] or 0
-        total_paid = claims_qs.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0
-        payment_rate = (total_paid / total_billed * 100) if total_billed > 0 else 0
-    
-    # C) Monthly trends (last 6 months) - Database agnostic
-    six_months_ago = timezone.now() - timedelta(days=180)
-
-    # Use database-appropriate date function
-    if connection.vendor == 'postgresql':
-        date_func = "TO_CHAR(discharge_date, 'YYYY-MM-01')"
+            return JsonResponse({'success': False, 'message': 'Invalid claim selection'}, status=400)
+    
+    if action == 'flag':
+        reason = request.POST.get('reason', '').strip() or 'Flagged for review'
+        count = bulk.bulk_flag(claims, request.user, reason)
+        message = f'Flagged {count} claim{"s" if count != 1 else ""} (already flagged claims were skipped)'
+    elif action == 'note':
+        content = request.POST.get('content', '').strip()
+        if not content:
+            return JsonResponse({'success': False, 'message': 'Note content is required'}, status=400)
+        note_type = request.POST.get('note_type', 'user')
+        if note_type not in dict(Note._meta.get_field('note_type').choices):
+            note_type = 'user'
+        count = bulk.bulk_note(claims, request.user, content, note_type)
+        message = f'Added a note to {count} claim{"s" if count != 1 else ""}'
     else:
-        date_func = "strftime('%%Y-%%m-01', discharge_date)"
-
-    monthly_data = claims_qs.filter(discharge_date__gte=six_months_ago).extra(
-        select={'month': date_func}
-    ).values('month', 'status').annotate(count=Count('id')).order_by('month')
-    
-    # Calculate payment ratio by month
-    payment_ratio_data = claims_qs.filter(discharge_date__gte=six_months_ago).extra(
-        select={'month': date_func}
-    ).values('month').annotate(
-        total_billed=Sum('billed_amount'),
-        total_paid=Sum('paid_amount')
-    ).annotate(
-        payment_ratio=Case(
-            When(total_billed__gt=0, then=F('total_paid') * 100.0 / F('total_billed')),
-            default=0,
-            output_field=FloatField()
-        )
-    ).order_by('month')
-    
-    # D) Insurer breakdown
-    insurer_data = claims_qs.values('insurer_name', 'status').annotate(count=Count('id'))
-    
-    # E) CPT codes analysis
-    cpt_codes = []
-    for detail in ClaimDetail.objects.filter(claim__in=claims_qs):
-        cpt_codes.extend(detail.cpt_codes_list)
-    top_cpt_codes = Counter(cpt_codes).most_common(10)
-    
-    # F) Aging analysis (Under Review only)
-    now = timezone.now().date()
-    aging_buckets = {
-        '0-30': claims_qs.filter(status='Under Review', discharge_date__gte=now-timedelta(days=30)).count(),
-        '31-60': claims_qs.filter(status='Under Review', discharge_date__gte=now-timedelta(days=60), discharge_date__lt=now-timedelta(days=30)).count(),
-        '61-90': claims_qs.filter(status='Under Review', discharge_date__gte=now-timedelta(days=90), discharge_date__lt=now-timedelta(days=60)).count(),
-        '90+': claims_qs.filter(status='Under Review', discharge_date__lt=now-timedelta(days=90)).count(),
-    }
-    
-    # G) Flag backlog
-    total_flags = Flag.objects.filter(claim__in=claims_qs).count()
-    recent_flags = Flag.objects.filter(claim__in=claims_qs, created_at__gte=now-timedelta(days=7)).count()
-    
-    # H) Recent activity (flags + notes)
-    recent_flags_activity = Flag.objects.filter(claim__in=claims_qs).select_related('claim', 'user').order_by('-created_at')[:5]
-    recent_notes_activity = Note.objects.filter(claim__in=claims_qs).select_related('claim', 'user').order_by('-created_at')[:5]
-    
-    # Combine and sort recent activity
-    recent_activity = []
-    for flag in recent_flags_activity:
-        recent_activity.append({
-            'type': 'flag',
-            'claim_id': flag.claim.id,
-            'user': flag.user.username,
-            'content': flag.reason[:50] + '...' if len(flag.reason) > 50 else flag.reason,
-            'created_at': flag.created_at.isoformat(),
-            'created_at_human': flag.created_at.strftime('%b %d, %Y at %I:%M %p'),
-            'is_resolved': flag.is_resolved
-        })
-    for note in recent_notes_activity:
-        recent_activity.append({
-            'type': 'note',
-            'claim_id': note.claim.id,
-            'user': note.user.username,
-            'content': note.content[:50] + '...' if len(note.content) > 50 else note.content,
-            'created_at': note.created_at.isoformat(),
-            'created_at_human': note.created_at.strftime('%b %d, %Y at %I:%M %p'),
-            'note_type': note.note_type
-        })
-    
-    recent_activity.sort(key=lambda x: x['created_at'], reverse=True)
-    recent_activity = recent_activity[:10]
+        count = bulk.bulk_resolve(claims, request.user)
+        message = f'Resolved {count} flag{"s" if count != 1 else ""}'
     
-    # I) Top underpayment (Paid claims only)
-    top_underpayment = claims_qs.filter(status='Paid').annotate(
-        underpayment=F('billed_amount') - F('paid_amount')
-    ).filter(underpayment__gt=0).order_by('-underpayment')[:10]
-    
-    # K) Get unique insurers and statuses for filters - ALWAYS get from ALL claims, not filtered
-    all_insurers = Claim.objects.values_list('insurer_name', flat=True).distinct().order_by('insurer_name')
-    statuses = ['All', 'Paid', 'Denied', 'Under Review']
+    return JsonResponse({'success': True, 'message': message, 'count': count})
+
+
+@login_required
+@admin_required
+@replica_reads
+def dashboard(request):
+    """Enhanced admin dashboard with comprehensive analytics"""
+    filters = get_dashboard_filters(request.GET)
+    # Only the KPI header is computed here; panels load via dashboard_panel
+    context = build_header_context(filters)
+    context['lazy_panels'] = True
+    context['live_updates'] = settings.LIVE_UPDATES_ENABLED
     
-    context = {
-        # Basic counts
-        'total_claims': total_claims,
-        'paid_claims': paid_claims,
-        'denied_claims': denied_claims,
-        'under_review_claims': under_review_claims,
-        
-        # Rates
-        'payment_rate': round(payment_rate, 1),
-        'denial_rate': round((denied_claims / total_claims * 100) if total_claims > 0 else 0, 1),
-        
-        # Monthly data for charts
-        'monthly_data': list(monthly_data),
-        
-        # Breakdowns
-        'insurer_data': list(insurer_data),
-        'top_cpt_codes': top_cpt_codes,
-        
-        # Operational
-        'aging_buckets': aging_buckets,
-        'total_flags': total_flags,
-        'recent_flags': recent_flags,
-        'recent_activity': recent_activity,
-        
-        # Spotlight
-        'top_underpayment': top_underpayment,
-        
-        # Filters - use all_insurers for dropdown options
-        'insurers': all_insurers,
-        'statuses': statuses,
-        'current_filters': {
-            'from_date': from_date,
-            'to_date': to_date,
-            'insurer': insurer,
-            'status': status,
-        }
-    }
+    if request.headers.get('HX-Request'):
+        return render(request, 'claims/partials/dashboard_content.html', context)
+    return render(request, 'claims/dashboard.html', context)
+
+
+@login_required
+@admin_required
+@cache_control(private=True)
+@cache_page(settings.DASHBOARD_PANEL_CACHE_TTL)
+@replica_reads
+def dashboard_panel(request, panel):
+    """Render one dashboard panel (HTMX partial, cached per panel and filters)"""
+    if panel not in PANEL_TEMPLATES:
+        raise Http404('Unknown dashboard panel')
+    
+    filters = get_dashboard_filters(request.GET)
+    context = build_panel_context(panel, filters)
+    return render(request, PANEL_TEMPLATES[panel], context)
+
+
+def _resolve_admin(request):
+    """Resolve the lazy user and their role; returns (is_authenticated, is_admin)"""
+    if not request.user.is_authenticated:
+        return False, False
+    return True, get_user_role(request) == 'admin'
+
+
+@replica_reads
+async def dashboard_async(request):
+    """Async admin dashboard - independent sections run concurrently (best served via ASGI)"""
+    is_authenticated, is_admin = await sync_to_async(_resolve_admin)(request)
+    if not is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if not is_admin:
+        return await sync_to_async(render)(request, 'claims/not_authorized.html', status=403)
+
+    filters = get_dashboard_filters(request.GET)
+    context = await abuild_dashboard_context(filters)
+    context['live_updates'] = settings.LIVE_UPDATES_ENABLED
+    return await sync_to_async(render)(request, 'claims/dashboard.html', context)
+
+
+async def live_events(request):
+    """Server-sent activity events for ?claim=<key> (repeatable), or for all claims (admins)"""
+    if not settings.LIVE_UPDATES_ENABLED:
+        # Under WSGI the stream is buffered until it ends, so nothing would
+        # arrive live; 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    
+    is_authenticated, is_admin = await sync_to_async(_resolve_admin)(request)
+    if not is_authenticated:
+        # 401 (not a login redirect) so EventSource stops reconnecting
+        return HttpResponse(status=401)
     
-    # Serialize data for JavaScript - convert to basic Python types
-    monthly_data_list = list(monthly_data)
-    insurer_data_list = list(insurer_data)
-    payment_ratio_list = list(payment_ratio_data)
-    
-    context['monthly_data_json'] = json.dumps([
-        {
-            'month': item['month'],
-            'status': item['status'],
-            'count': item['count']
-        } for item in monthly_data_list
-    ])
-    context['insurer_data_json'] = json.dumps([
-        {
-            'insurer_name': item['insurer_name'],
-            'status': item['status'],
-            'count': item['count']
-        } for item in insurer_data_list
-    ])
-    context['payment_ratio_json'] = json.dumps([
-        {
-            'month': item['month'],
-            'payment_ratio': round(float(item['payment_ratio']), 1)
-        } for item in payment_ratio_list
-    ])
-    context['top_cpt_codes_json'] = json.dumps(top_cpt_codes)
-    context['recent_activity_json'] = json.dumps(recent_activity)
+    try:
+        claim_ids = [int(claim_id) for claim_id in request.GET.getlist('claim')]
+    except ValueError:
+        return HttpResponseBadRequest()
+    if not claim_ids and not is_admin:
+        return HttpResponseForbidden()
     
-    return render(request, 'claims/dashboard.html', context)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    
+    response = StreamingHttpResponse(
+        live.stream_events(claim_ids, last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+def _upload_rejects_path(kind):
+    """Timestamped rejected-rows file for an uploaded claims/details file"""
+    os.makedirs(settings.IMPORT_REJECTS_DIR, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(settings.IMPORT_REJECTS_DIR, f'{kind}-{stamp}.rejected.csv')
 
 
 @login_required
@@ -596,6 +646,10 @@ def dashboard(request):
 def data_upload(request):
     """Data upload view for CSV/JSON files - Admin only"""
     if request.method == 'POST':
+        # Only uploads need the import machinery; keep it off the cold-start path
+        import tempfile
+        from django.core.management import call_command, load_command_class
+
         form = DataUploadForm(request.POST, request.FILES)
         if form.is_valid():
             try:
@@ -604,6 +658,7 @@ def data_upload(request):
                 details_file = request.FILES.get('details_file')
                 file_format = form.cleaned_data['file_format']
                 clear_existing = form.cleaned_data['clear_existing']
+                rejected = []
                 
                 # Load claims data first
                 if claims_file:
@@ -613,13 +668,16 @@ def data_upload(request):
                         claims_temp_path = temp_file.name
                     
                     # Load claims data
-                    load_command = LoadDataCommand()
-                    load_command.handle(
+                    load_command = load_command_class('claims', 'load_claims_data')
+                    call_command(
+                        load_command,
                         file=claims_temp_path,
                         format=file_format,
-                        clear=clear_existing
+                        clear=clear_existing,
+                        rejects=_upload_rejects_path('claims'),
                     )
                     os.unlink(claims_temp_path)
+                    rejected.append(('claims', load_command))
                 
                 # Load details data if provided
                 if details_file:
@@ -629,9 +687,16 @@ def data_upload(request):
                         details_temp_path = temp_file.name
                     
                     # Load details data
-                    from django.core.management import call_command
-                    call_command('load_claim_details', file=details_temp_path, format=file_format, clear=clear_existing)
+                    details_command = load_command_class('claims', 'load_claim_details')
+                    call_command(
+                        details_command,
+                        file=details_temp_path,
+                        format=file_format,
+                        clear=clear_existing,
+                        rejects=_upload_rejects_path('details'),
+                    )
                     os.unlink(details_temp_path)
+                    rejected.append(('details', details_command))
                 
                 # Success message
                 files_loaded = []
@@ -641,6 +706,12 @@ def data_upload(request):
                     files_loaded.append(f'Details: {details_file.name}')
                 
                 messages.success(request, f'Successfully loaded: {", ".join(files_loaded)}')
+                for kind, command in rejected:
+                    if getattr(command, 'rejected_count', 0):
+                        messages.warning(
+                            request,
+                            f'{command.rejected_count} {kind} rows were rejected; see {command.rejects_path}'
+                        )
                 return redirect('claims:dashboard')
                 
             except Exception as e:
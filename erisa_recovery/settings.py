@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,6 +25,13 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1').split(',')
 
+# Slim profile for serverless cold starts (see vercel.json and
+# `manage.py profile_startup`): leaves out the crispy forms apps, which no
+# template uses, and by default Google sign-in, whose allauth providers pull
+# in requests, jwt and cryptography on every start
+SLIM_STARTUP = config('SLIM_STARTUP', default=False, cast=bool)
+GOOGLE_OAUTH_ENABLED = config('GOOGLE_OAUTH_ENABLED', default=not SLIM_STARTUP, cast=bool)
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -35,14 +42,20 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.sites',
     'claims',
-    'crispy_forms',
-    'crispy_tailwind',
-    # Django Allauth
-    'allauth',
-    'allauth.account',
-    'allauth.socialaccount',
-    'allauth.socialaccount.providers.google',
 ]
+if not SLIM_STARTUP:
+    INSTALLED_APPS += [
+        'crispy_forms',
+        'crispy_tailwind',
+    ]
+if GOOGLE_OAUTH_ENABLED:
+    INSTALLED_APPS += [
+        # Django Allauth
+        'allauth',
+        'allauth.account',
+        'allauth.socialaccount',
+        'allauth.socialaccount.providers.google',
+    ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -51,10 +64,13 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'claims.middleware.UserRoleMiddleware',  # Session-cached role as request.user_role
+    'claims.middleware.ReplicaPinMiddleware',  # Read-your-writes when a replica is configured
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'allauth.account.middleware.AccountMiddleware',
 ]
+if GOOGLE_OAUTH_ENABLED:
+    MIDDLEWARE.append('allauth.account.middleware.AccountMiddleware')
 
 ROOT_URLCONF = 'erisa_recovery.urls'
 
@@ -62,8 +78,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Templates are compiled once per process; runserver's autoreloader
+            # clears the cache when a template changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -90,6 +113,45 @@ else:
         }
     }
 
+# Keep connections open between requests (seconds; 0 closes after each request).
+# Opt in under WSGI only: under ASGI, sync_to_async(thread_sensitive=False)
+# runs on executor threads, each keeping its own connection that no request
+# cycle closes, so idle connections pile up.
+DATABASES['default']['CONN_MAX_AGE'] = config('CONN_MAX_AGE', default=0, cast=int)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# SQLite tuning, applied as PRAGMAs on every new connection (claims.signals).
+# WAL lets requests keep reading while an import writes; busy_timeout makes
+# writers wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # milliseconds
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-64000, cast=int),  # negative = KiB
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),  # bytes
+    'temp_store': 'MEMORY',
+}
+
+# Read replica: claims list, claim detail and dashboard reads go to it when
+# set; a user's own writes pin their reads to the primary for PIN_SECONDS
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default=None)
+if REPLICA_DATABASE_URL:
+    import dj_database_url
+    DATABASES['replica'] = dj_database_url.parse(REPLICA_DATABASE_URL)
+    DATABASES['replica']['CONN_MAX_AGE'] = DATABASES['default']['CONN_MAX_AGE']
+    DATABASES['replica']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['claims.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=15, cast=int)
+
+# Cache (per-process memory by default; point CACHE_BACKEND at Redis/Memcached to share across workers)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='erisa-recovery'),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -125,9 +187,14 @@ STATICFILES_DIRS = [
 ]
 
 # Add whitenoise for serving static files in production
+# (content-hashed names, gzip and - with Brotli installed - brotli copies;
+# hashed files are served with far-future cache headers)
 if not DEBUG:
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Serve the bundles from `manage.py build_assets` instead of the CDN scripts
+ASSET_BUNDLES = config('ASSET_BUNDLES', default=False, cast=bool)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -143,14 +210,69 @@ LOGIN_URL = 'claims:login'
 LOGIN_REDIRECT_URL = 'claims:claims_list'
 LOGOUT_REDIRECT_URL = 'claims:login'
 
+# Claims search: per-user cache of recent result pages (filters -> claim IDs)
+CLAIMS_SEARCH_CACHE_SIZE = config('CLAIMS_SEARCH_CACHE_SIZE', default=20, cast=int)
+CLAIMS_SEARCH_CACHE_TTL = config('CLAIMS_SEARCH_CACHE_TTL', default=60, cast=int)  # seconds
+
+# Bulk flag/note actions insert in batches of this many rows
+CLAIMS_BULK_BATCH_SIZE = config('CLAIMS_BULK_BATCH_SIZE', default=500, cast=int)
+
+# Activity timeline page size (keyset paginated)
+ACTIVITY_PAGE_SIZE = config('ACTIVITY_PAGE_SIZE', default=20, cast=int)
+
+# Live activity updates (server-sent events). Enable only when served via
+# ASGI: under WSGI the stream is buffered until it closes and holds a worker
+# for LIVE_UPDATES_MAX_AGE. When off, the activity timelines load without
+# the live stream and the endpoint answers 204.
+LIVE_UPDATES_ENABLED = config('LIVE_UPDATES_ENABLED', default=False, cast=bool)
+# POLL_INTERVAL > 0 polls the activity table so events from every worker
+# are delivered; 0 uses the in-process broker (single worker only).
+LIVE_UPDATES_POLL_INTERVAL = config('LIVE_UPDATES_POLL_INTERVAL', default=0, cast=float)  # seconds
+LIVE_UPDATES_HEARTBEAT = config('LIVE_UPDATES_HEARTBEAT', default=15, cast=int)  # seconds
+LIVE_UPDATES_MAX_AGE = config('LIVE_UPDATES_MAX_AGE', default=300, cast=int)  # seconds before the client reconnects
+LIVE_UPDATES_RETRY_MS = config('LIVE_UPDATES_RETRY_MS', default=3000, cast=int)
+LIVE_UPDATES_QUEUE_SIZE = config('LIVE_UPDATES_QUEUE_SIZE', default=100, cast=int)
+
+# Imports: rows validated/loaded per chunk, and where imports write rejected rows
+IMPORT_CHUNK_SIZE = config('IMPORT_CHUNK_SIZE', default=2000, cast=int)
+IMPORT_REJECTS_DIR = config('IMPORT_REJECTS_DIR', default=str(BASE_DIR / 'import_rejects'))
+
+# Async dashboard: max sections (and DB connections) running at once; 1 runs
+# them one after another on the request's connection. SQLite serializes the
+# reads anyway, so it defaults to 1 there
+DASHBOARD_MAX_CONCURRENCY = config(
+    'DASHBOARD_MAX_CONCURRENCY',
+    default=1 if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' else 4,
+    cast=int,
+)
+
+# Lazily loaded dashboard panels are cached per panel + filters
+DASHBOARD_PANEL_CACHE_TTL = config('DASHBOARD_PANEL_CACHE_TTL', default=300, cast=int)  # seconds
+
+# Aging buckets: strictly increasing day edges (0-30, 31-60, 61-90, 90+; checked
+# at startup) and statuses snapshotted nightly
+CLAIMS_AGING_BUCKET_EDGES = config('CLAIMS_AGING_BUCKET_EDGES', default='30,60,90', cast=Csv(int))
+CLAIMS_AGING_SNAPSHOT_STATUSES = config('CLAIMS_AGING_SNAPSHOT_STATUSES', default='Under Review,Denied', cast=Csv())
+
+# Cold claims archive: claims in these statuses discharged more than this many
+# days ago are moved to ArchivedClaim by the archive_claims command
+CLAIMS_ARCHIVE_AFTER_DAYS = config('CLAIMS_ARCHIVE_AFTER_DAYS', default=730, cast=int)
+CLAIMS_ARCHIVE_STATUSES = config('CLAIMS_ARCHIVE_STATUSES', default='Paid', cast=Csv())
+
+# How long a user's role stays cached in their session before it is re-read
+USER_ROLE_CACHE_TTL = config('USER_ROLE_CACHE_TTL', default=300, cast=int)  # seconds
+
 # Session settings
+# cached_db reads sessions from the cache and only hits the DB on a miss;
+# 'django.contrib.sessions.backends.signed_cookies' avoids server storage entirely
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 # Django Allauth settings
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    # Username or email in one indexed lookup; also serves allauth's email login
+    'claims.backends.EmailOrUsernameBackend',
 ]
 
 # Allauth settings
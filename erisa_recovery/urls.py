@@ -14,6 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
@@ -25,6 +26,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', redirect_to_claims, name='home'),
     path('claims/', include('claims.urls')),
-    # Django Allauth URLs
-    path('accounts/', include('allauth.urls')),
 ]
+
+if settings.GOOGLE_OAUTH_ENABLED:
+    # Django Allauth URLs
+    urlpatterns.append(path('accounts/', include('allauth.urls')))
@@ -0,0 +1,127 @@
+// Smaller Donut Chart for Hero Section
+document.addEventListener('DOMContentLoaded', function() {
+    const ctx = document.getElementById('heroDonutChart');
+    if (ctx) {
+        new Chart(ctx, {
+            type: 'doughnut',
+            data: {
+                labels: ['Paid', 'Denied', 'Under Review'],
+                datasets: [{
+                    data: [1283, 945, 3973],
+                    backgroundColor: [
+                        '#10b981', // emerald-500
+                        '#ef4444', // red-500
+                        '#eab308'  // yellow-500
+                    ],
+                    borderWidth: 0,
+                    cutout: '60%'
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: true,
+                plugins: {
+                    legend: {
+                        display: false
+                    },
+                    tooltip: {
+                        enabled: true,
+                        callbacks: {
+                            label: function(context) {
+                                const label = context.label || '';
+                                const value = context.parsed;
+                                const total = context.dataset.data.reduce((a, b) => a + b, 0);
+                                const percentage = ((value / total) * 100).toFixed(1);
+                                return `${label}: ${value} (${percentage}%)`;
+                            }
+                        }
+                    }
+                },
+                elements: {
+                    arc: {
+                        borderWidth: 0
+                    }
+                }
+            }
+        });
+    }
+});
+
+// Relative times: the server renders <time data-relative> with the
+// absolute time; format all of them against one clock reading, again
+// for every HTMX/SSE swap and once a minute
+function relativeTime(seconds) {
+    if (seconds >= 86400) {
+        const days = Math.floor(seconds / 86400);
+        return `${days} day${days > 1 ? 's' : ''} ago`;
+    } else if (seconds >= 3600) {
+        const hours = Math.floor(seconds / 3600);
+        return `${hours} hour${hours > 1 ? 's' : ''} ago`;
+    } else if (seconds >= 60) {
+        const minutes = Math.floor(seconds / 60);
+        return `${minutes} minute${minutes > 1 ? 's' : ''} ago`;
+    }
+    return 'Just now';
+}
+
+function formatRelativeTimes(root) {
+    const now = Date.now();
+    root.querySelectorAll('time[data-relative]').forEach(function(el) {
+        const seconds = (now - Date.parse(el.getAttribute('datetime'))) / 1000;
+        if (!isNaN(seconds)) {
+            el.textContent = relativeTime(seconds);
+        }
+    });
+}
+
+htmx.onLoad(formatRelativeTimes);
+setInterval(function() { formatRelativeTimes(document); }, 60000);
+
+// Listen for the open-modal event - ONLY for claim detail requests
+document.addEventListener('htmx:afterRequest', function(event) {
+    // Only open modal if the target is the claim detail content
+    if (event.detail.xhr.getResponseHeader('Content-Type')?.includes('text/html') && 
+        event.detail.target.id === 'claim-detail-content') {
+        const modal = document.getElementById('claim-detail-modal');
+        if (modal) {
+            modal.style.display = 'block';
+            modal._x_dataStack[0].open = true;
+        }
+    }
+});
+
+// Close modal when clicking outside
+document.addEventListener('click', function(event) {
+    const modal = document.getElementById('claim-detail-modal');
+    if (event.target === modal) {
+        modal.style.display = 'none';
+        modal._x_dataStack[0].open = false;
+    }
+});
+
+// Auto-hide success badge after 5 seconds
+document.addEventListener('DOMContentLoaded', function() {
+    const successBadges = document.querySelectorAll('.animate-pulse');
+    successBadges.forEach(function(badge) {
+        setTimeout(function() {
+            badge.style.transition = 'opacity 0.5s ease-out';
+            badge.style.opacity = '0';
+            setTimeout(function() {
+                badge.remove();
+            }, 500);
+        }, 5000);
+    });
+});
+
+// Keyboard navigation for profile dropdown
+document.addEventListener('keydown', function(event) {
+    if (event.key === 'Escape') {
+        // Close any open dropdowns
+        const dropdowns = document.querySelectorAll('[x-data*="open"]');
+        dropdowns.forEach(dropdown => {
+            if (dropdown._x_dataStack && dropdown._x_dataStack[0]) {
+                dropdown._x_dataStack[0].open = false;
+            }
+        });
+    }
+});